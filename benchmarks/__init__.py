@@ -0,0 +1,9 @@
+"""benchmarks package - Performance benchmarks for Calgary Library Scraper.
+
+Offline timing scripts for the scraping pipeline that run against saved
+pages instead of the live catalog.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
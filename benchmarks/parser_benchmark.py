@@ -0,0 +1,329 @@
+"""parser_benchmark.py - Compare search page extractor speed.
+
+Times the lxml card extractor, with and without partial parsing of the
+result list, and the embedded JSON state decoder against the reference
+BeautifulSoup extractor. Pages without embedded state fall back to the
+lxml extractor in the json-state row. The lxml-projected row extracts
+only title, author and link.
+
+Pages are read from the checked-in corpus in benchmarks/corpus unless
+files are given on the command line. Every extractor is timed per page,
+including tree building, and per card, on cards whose tree was built
+beforehand. The "py KiB" column is the peak Python heap allocated while
+parsing; tracemalloc does not see the native memory libxml2 uses for
+its trees, so it cannot show what partial parsing saves there. With
+--check, the output of every extractor, projected ones included, is
+compared with corpus/expected.json, so parser regressions are caught
+offline, and speedups that fall well below baseline.json are reported. Wall-clock speedups vary too much
+between runs on shared machines to fail on, unless --strict is given.
+
+Usage:
+    python -m benchmarks.parser_benchmark [page1.html ...] [--repeat N]
+    python -m benchmarks.parser_benchmark --check [--strict]
+    python -m benchmarks.parser_benchmark --save-baseline
+    python -m benchmarks.parser_benchmark --update-expected
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+from bs4 import BeautifulSoup
+from lxml import html
+from src.parser import (parse_search_page, parse_search_page_soup, normalize_fields,
+                        _extract_card, _extract_card_soup, _slice_results, _CARDS_XPATH,
+                        RESULT_CARD_CLASS, BOOK_FIELDS)
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCHMARK_DIR, "corpus")
+EXPECTED_FILE = os.path.join(CORPUS_DIR, "expected.json")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+BASELINE_TOLERANCE = 0.5
+PROJECTION = normalize_fields(("title", "author", "link"))
+
+EXTRACTORS = {
+    "beautifulsoup": parse_search_page_soup,
+    "lxml-full": lambda page: parse_search_page(page, partial=False, use_state=False),
+    "lxml": lambda page: parse_search_page(page, use_state=False),
+    "lxml-projected": lambda page: parse_search_page(page, use_state=False, fields=PROJECTION),
+    "json-state": parse_search_page,
+}
+
+# Name -> fields the extractor fills in, for those that do not extract every field
+PROJECTED_EXTRACTORS = {"lxml-projected": PROJECTION}
+
+def _soup_cards(page: str) -> list:
+    """Build the BeautifulSoup tree of a page and return its result cards."""
+    return BeautifulSoup(page, 'lxml').find_all('div', class_=RESULT_CARD_CLASS)
+
+def _lxml_cards(page: str) -> list:
+    """Build the lxml tree of a page's result list and return its result cards."""
+    _, card_markup = _slice_results(page)
+    return _CARDS_XPATH(html.document_fromstring(card_markup)) if card_markup else []
+
+# Name -> (card finder, card extractor) for the per-card timings
+CARD_EXTRACTORS = {
+    "beautifulsoup": (_soup_cards, _extract_card_soup),
+    "lxml": (_lxml_cards, _extract_card),
+    "lxml-projected": (_lxml_cards, lambda card: _extract_card(card, PROJECTION)),
+}
+
+def load_pages(paths: list = None) -> dict:
+    """Read saved search result pages, by default the whole corpus.
+    
+    Args:
+        paths (list, optional): HTML files to read. Defaults to every
+            page in CORPUS_DIR.
+    
+    Returns:
+        dict: File name -> raw HTML, in file name order.
+    """
+    paths = paths or sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html")))
+    pages = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            pages[os.path.basename(path)] = file.read()
+
+    return pages
+
+def record_fields(books: list) -> list:
+    """Flatten Book objects into JSON-comparable field lists.
+    
+    Args:
+        books (list): Book instances.
+    
+    Returns:
+        list: [title, author, format, pub_year, rating, num_ratings, link] per book.
+    """
+    return [[book.title, book.author, book.format, book.pub_year,
+             book.rating, book.num_ratings, book.link] for book in books]
+
+def _fastest_pass(run, repeat: int) -> float:
+    """Time repeated passes after a warm-up pass and keep the fastest.
+    
+    Taking the minimum filters out passes slowed down by other work on
+    the machine, which keeps the speedups comparable between runs.
+    
+    Args:
+        run (callable): One pass of the work being timed.
+        repeat (int): Number of timed passes.
+    
+    Returns:
+        float: Seconds taken by the fastest pass.
+    """
+    run()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+def time_extractor(extractor, pages: list, repeat: int) -> tuple:
+    """Parse every page repeatedly and time the fastest pass.
+    
+    Args:
+        extractor (callable): Function taking page HTML and returning (count, books).
+        pages (list): Raw HTML strings to parse.
+        repeat (int): Number of passes over the pages.
+    
+    Returns:
+        tuple: (seconds, cards_parsed) for one pass.
+    """
+    cards = sum(len(extractor(page)[1]) for page in pages)
+    seconds = _fastest_pass(lambda: [extractor(page) for page in pages], repeat)
+
+    return seconds, cards
+
+def time_card_extractor(find_cards, extractor, pages: list, repeat: int) -> tuple:
+    """Extract every prebuilt card repeatedly and time the fastest pass.
+    
+    Args:
+        find_cards (callable): Function building a page's tree and returning its cards.
+        extractor (callable): Function turning one card into a Book.
+        pages (list): Raw HTML strings to take the cards from.
+        repeat (int): Number of passes over the cards.
+    
+    Returns:
+        tuple: (seconds, cards_extracted) for one pass.
+    """
+    cards = [card for page in pages for card in find_cards(page)]
+    seconds = _fastest_pass(lambda: [extractor(card) for card in cards], repeat)
+
+    return seconds, len(cards)
+
+def measure_allocations(extractor, pages: list) -> int:
+    """Trace the peak Python heap allocated while parsing each page once.
+    
+    Native allocations, such as libxml2's document trees, are not traced.
+    
+    Args:
+        extractor (callable): Function taking page HTML and returning (count, books).
+        pages (list): Raw HTML strings to parse.
+    
+    Returns:
+        int: Largest peak of traced allocations over the pages, in bytes.
+    """
+    peak = 0
+    tracemalloc.start()
+    try:
+        for page in pages:
+            tracemalloc.reset_peak()
+            extractor(page)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+def run_benchmarks(pages: list, repeat: int) -> dict:
+    """Time and trace every extractor and print a results table.
+    
+    Args:
+        pages (list): Raw HTML strings to parse.
+        repeat (int): Number of passes over the pages.
+    
+    Returns:
+        dict: Extractor name -> speedup over the BeautifulSoup extractor.
+    """
+    speedups = {}
+    baseline = None
+    print(f"{'per page':<15} {'ms/page':>8}  {'cards/s':>10}  {'py KiB':>8}  speedup")
+    for name, extractor in EXTRACTORS.items():
+        seconds, cards = time_extractor(extractor, pages, repeat)
+        peak = measure_allocations(extractor, pages)
+        baseline = baseline or seconds
+        speedups[name] = round(baseline / seconds, 2)
+        print(f"{name:<15} {seconds / len(pages) * 1000:8.2f}  {cards / seconds:10.0f}  "
+              f"{peak / 1024:8.0f}  {speedups[name]:5.1f}x")
+
+    baseline = None
+    print(f"\n{'per card':<15} {'us/card':>8}  {'cards/s':>10}")
+    for name, (find_cards, extractor) in CARD_EXTRACTORS.items():
+        seconds, cards = time_card_extractor(find_cards, extractor, pages, repeat)
+        if not cards:
+            continue
+        baseline = baseline or seconds
+        print(f"{name:<15} {seconds / cards * 1e6:8.1f}  {cards / seconds:10.0f}  "
+              f"{baseline / seconds:5.1f}x")
+
+    return speedups
+
+def project_records(items: list, fields) -> list:
+    """Blank the fields a projection leaves out of recorded items.
+    
+    Args:
+        items (list): Field lists as produced by record_fields.
+        fields (iterable): Book attributes the projection extracts.
+    
+    Returns:
+        list: The items with every other field set to None.
+    """
+    return [[value if name in fields else None for name, value in zip(BOOK_FIELDS, item)]
+            for item in items]
+
+def check_expected(pages: dict) -> list:
+    """Compare every extractor's output with the recorded expected output.
+    
+    Projected extractors are compared with the expected items restricted
+    to their fields.
+    
+    Args:
+        pages (dict): File name -> raw HTML.
+    
+    Returns:
+        list: Descriptions of every mismatch; empty when all output matches.
+    """
+    with open(EXPECTED_FILE, encoding="utf-8") as file:
+        expected = json.load(file)
+
+    failures = []
+    for page_name, page in pages.items():
+        if page_name not in expected:
+            failures.append(f"{page_name}: no expected output recorded")
+            continue
+        for name, extractor in EXTRACTORS.items():
+            items = expected[page_name]["items"]
+            if name in PROJECTED_EXTRACTORS:
+                items = project_records(items, PROJECTED_EXTRACTORS[name])
+            target_item_count, books = extractor(page)
+            if (target_item_count != expected[page_name]["target_item_count"]
+                    or record_fields(books) != items):
+                failures.append(f"{page_name}: {name} output differs from expected")
+
+    return failures
+
+def check_baseline(speedups: dict) -> list:
+    """Compare speedups with the saved baseline.
+    
+    Args:
+        speedups (dict): Extractor name -> measured speedup.
+    
+    Returns:
+        list: Descriptions of every extractor slower than its baseline
+            by more than BASELINE_TOLERANCE.
+    """
+    with open(BASELINE_FILE, encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    return [f"{name}: {speedups[name]:.1f}x is below the {minimum:.1f}x baseline"
+            for name, minimum in baseline.items()
+            if name in speedups and speedups[name] < minimum * (1 - BASELINE_TOLERANCE)]
+
+def main() -> None:
+    """Run the benchmark on the corpus or on the pages given on the command line."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("pages", nargs="*", help="Saved search result HTML files (default: corpus)")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="Passes over the pages")
+    arg_parser.add_argument("--check", action="store_true",
+                            help="Fail on output regressions and report slow extractors")
+    arg_parser.add_argument("--strict", action="store_true",
+                            help="With --check, also fail on speedups below the baseline")
+    arg_parser.add_argument("--save-baseline", action="store_true",
+                            help="Record the measured speedups as the new baseline")
+    arg_parser.add_argument("--update-expected", action="store_true",
+                            help="Record the reference extractor's output for the corpus")
+    args = arg_parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if args.update_expected:
+        expected = {}
+        for page_name, page in pages.items():
+            target_item_count, books = parse_search_page_soup(page)
+            expected[page_name] = {"target_item_count": target_item_count, "items": record_fields(books)}
+        with open(EXPECTED_FILE, "w", encoding="utf-8") as file:
+            json.dump(expected, file, indent=1, ensure_ascii=False)
+        print(f"Recorded expected output for {len(expected)} pages in {EXPECTED_FILE}")
+        return
+
+    speedups = run_benchmarks(list(pages.values()), args.repeat)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as file:
+            json.dump(speedups, file, indent=1)
+        print(f"\nSaved baseline to {BASELINE_FILE}")
+
+    if args.check:
+        failures = check_expected(pages)
+        slow = check_baseline(speedups)
+        if args.strict:
+            failures += slow
+        else:
+            for warning in slow:
+                print(f"WARN {warning}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if failures:
+            sys.exit(1)
+        print("\nNo parser regressions found")
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,11 @@ __author__ = "Abiola Raji"
 __version__ = "1.0"
 __date__ = "2025-09-03"
 
+import argparse
+import sys
 import time
 import os
-from src import LibraryDB, scrape_library_data, generate_charts, write_to_file, export_as_csv
+from src import LibraryDB, ParseCache, ResponseCache, RESPONSE_CACHE_TTL, PageArchive, DICTIONARY_TRAIN_PAGES, scrape_library_data, scrape_queries, enrich_library_items, reparse_archive, unfinished_queries, PARTITION_FACETS, MAX_PARTITION_ITEMS, generate_charts, write_to_file, export_as_csv, export_by_query
     
 def get_query() -> str:
     """Prompt user for search term and return their input.
@@ -24,6 +26,61 @@ def get_query() -> str:
         
     return query
 
+def read_queries(file_path: str) -> list:
+    """Read batch search terms, one per line.
+    
+    Blank lines and lines starting with "#" are skipped.
+    
+    Args:
+        file_path (str): Path to the query list, or "-" for standard input.
+        
+    Returns:
+        list: Search terms in file order.
+    """
+    file = sys.stdin if file_path == "-" else open(file_path, encoding="utf-8")
+    try:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options.
+    
+    Returns:
+        argparse.Namespace: Options with archive, reparse, batch, partitioning,
+            fetching and enrichment settings.
+    """
+    arg_parser = argparse.ArgumentParser(description="Calgary Public Library data scraping and analysis.")
+    arg_parser.add_argument("--archive", action="store_true",
+                            help="Keep a compressed copy of every fetched page in archive.db")
+    arg_parser.add_argument("--reparse", action="store_true",
+                            help="Rebuild results from archived pages instead of scraping")
+    arg_parser.add_argument("--archive-dictionary-after", type=int, default=DICTIONARY_TRAIN_PAGES,
+                            metavar="PAGES", help="Train a shared Zstandard dictionary once this many pages are archived (0 disables)")
+    arg_parser.add_argument("--partition-by", choices=PARTITION_FACETS,
+                            help="Crawl one partition per format, or per publication-year range, in parallel")
+    arg_parser.add_argument("--max-partition-items", type=int, default=MAX_PARTITION_ITEMS,
+                            help="Largest result count of a publication-year range")
+    arg_parser.add_argument("--batch", metavar="FILE",
+                            help="Scrape every query listed in FILE (one per line, - for stdin) in one run")
+    arg_parser.add_argument("--concurrency", type=int, default=1,
+                            help="Download up to this many result pages at once over HTTP")
+    arg_parser.add_argument("--engine", choices=("http", "browser"), default="http",
+                            help="Fetch pages over HTTP, or render every page in Chrome")
+    arg_parser.add_argument("--num-drivers", type=int, default=1,
+                            help="Chrome instances rendering pages in parallel with --engine browser")
+    arg_parser.add_argument("--parse-workers", type=int, default=0,
+                            help="Parse pages in this many worker processes (0 parses in the main process)")
+    arg_parser.add_argument("--enrich", action="store_true",
+                            help="Fetch ISBN, page count, subjects, series and language from item pages")
+    arg_parser.add_argument("--enrich-max-age", type=float, default=30, metavar="DAYS",
+                            help="Skip items enriched within this many days")
+    arg_parser.add_argument("--response-cache-max-age", type=float, default=RESPONSE_CACHE_TTL / 3600,
+                            metavar="HOURS", help="Reuse detail pages fetched within this many hours")
+
+    return arg_parser.parse_args()
+
 def remove_file(file_path: str):
     """Remove a file from the filesystem.
     
@@ -33,21 +90,53 @@ def remove_file(file_path: str):
     os.remove(file_path)
 
 if __name__ == "__main__":
+    args = parse_args()
     library_db = LibraryDB()
-    library_db.create_table()
-    query = get_query()
+    queries = read_queries(args.batch) if args.batch else [get_query()]
+    query = queries[0] if len(queries) == 1 else f"{len(queries)} queries"
+    archive = PageArchive(train_after=args.archive_dictionary_after) if args.archive or args.reparse else None
+
+    if args.reparse:
+        library_db.create_table()
+        print("\nRe-parsing archived pages...")
+        for batch_query in queries:
+            if not reparse_archive(library_db, archive, batch_query, parse_workers=args.parse_workers):
+                print(f"No archived pages found for '{batch_query}'.")
+        if not library_db.get_item_count():
+            sys.exit(1)
+    else:
+        library_db.create_table(reset=False)
+        unfinished = unfinished_queries(library_db, queries, args.partition_by)
+        if unfinished:
+            print(f"\nFound unfinished searches for {unfinished}, resuming...")
+        else:
+            library_db.create_table()
 
-    print("\nStarting library search...")
-    scrape_library_data(library_db, query)
+        print("\nStarting library search...")
+        options = dict(concurrency=args.concurrency, engine=args.engine, num_drivers=args.num_drivers,
+                       parse_workers=args.parse_workers, parse_cache=ParseCache(), archive=archive,
+                       partition_by=args.partition_by, max_partition_items=args.max_partition_items)
+        if args.batch:
+            scrape_queries(library_db, queries, **options)
+        else:
+            scrape_library_data(library_db, query, **options)
 
     print(f"\nScraped {library_db.get_item_count()} items for '{query}'.")
 
+    if args.enrich:
+        print("\nEnriching items from their detail pages...")
+        enrich_library_items(library_db, max_age=args.enrich_max_age * 24 * 60 * 60,
+                             response_cache=ResponseCache(ttl=args.response_cache_max_age * 60 * 60))
+
     print("\nWriting results to 'results/library_items.txt' and 'results/library_results.txt'...")
     write_to_file(library_db, query)
     time.sleep(1)
 
     print("\nExporting results as csv to results/library_items.csv")
     export_as_csv(library_db)
+    if args.batch:
+        print("Exporting results tagged by query to results/library_items_by_query.csv")
+        export_by_query(library_db)
     time.sleep(1)
 
     print("\nGenerating charts...")
@@ -9,7 +9,10 @@ __author__ = "Abiola Raji"
 __version__ = "1.0"
 __date__ = "2025-09-03"
 
-from .library_db import LibraryDB, Book, prettify
-from .scraper import scrape_library_data, _get_driver, _get_target_item_count
+from .library_db import LibraryDB, Book, ParseCache, ResponseCache, RESPONSE_CACHE_TTL, prettify
+from .authors import canonical_author
+from .archive import PageArchive, DICTIONARY_TRAIN_PAGES
+from .parser import parse_search_page, parse_search_page_soup, parse_search_state, parse_search_pages, page_fingerprint, normalize_fields, parse_item_details, BOOK_FIELDS, DETAIL_FIELDS
+from .scraper import scrape_library_data, scrape_queries, enrich_library_items, iter_library_data, reparse_archive, search_key, is_scrape_incomplete, has_scrape_progress, unfinished_queries, PARTITION_FACETS, MAX_PARTITION_ITEMS, configure_session, RetryPolicy, RateController, _get_driver, _get_target_item_count
 from .charts import Charts, generate_charts
-from .files import write_to_file, export_as_csv
\ No newline at end of file
+from .files import write_to_file, export_as_csv, export_by_query
\ No newline at end of file
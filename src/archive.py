@@ -0,0 +1,388 @@
+"""archive.py - Compressed archive of fetched search result pages.
+
+Stores the raw HTML of every fetched results page so that a parser fix
+can be applied by re-parsing locally instead of scraping the catalog
+again. Pages are compressed with Zstandard when the optional zstandard
+package is installed and with zlib (the DEFLATE algorithm used by gzip)
+otherwise. Zstandard can also use a dictionary trained on earlier pages,
+since search pages repeat the same site chrome. Pages are indexed by
+query, page number and fetch time.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_PATH = 'archive.db'
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+DICTIONARY_SIZE = 64 * 1024
+DICTIONARY_SAMPLES = 200
+DICTIONARY_TRAIN_PAGES = 100
+
+class PageArchive:
+    """SQLite archive of compressed search result pages.
+    
+    Every fetch of a page is kept, so the archive records how a query's
+    results changed over time; readers get the latest fetch of each page
+    unless they ask for an earlier point in time.
+    """
+
+    def __init__(self, path: str = ARCHIVE_PATH, codec: str = None, train_after: int = None):
+        """Open the archive and create its tables if needed.
+        
+        Args:
+            path (str): SQLite file holding the archive. Default ARCHIVE_PATH.
+            codec (str, optional): "zstd" or "zlib". Defaults to "zstd" when
+                the zstandard package is installed and "zlib" otherwise.
+            train_after (int, optional): Train a shared dictionary with
+                build_dictionary once this many pages are archived, if the
+                archive has none yet. Ignored by the zlib codec.
+        
+        Raises:
+            ValueError: If the codec is unknown or zstandard is not installed.
+        """
+        codec = codec or ("zstd" if zstandard is not None else "zlib")
+        if codec not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown archive codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("The zstd codec needs the zstandard package")
+
+        self.path = path
+        self.codec = codec
+        self.train_after = train_after if codec == "zstd" else None
+        self._dictionaries = {}
+        self._train_lock = threading.Lock()
+        try:
+            conn = sqlite3.connect(self.path)
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_pages (
+                    query TEXT,
+                    page_number INTEGER,
+                    fetched_at REAL,
+                    codec TEXT,
+                    dictionary_id INTEGER,
+                    html BLOB
+                );
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS archived_pages_lookup
+                ON archived_pages (query, page_number, fetched_at);
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archive_dictionaries (
+                    dictionary_id INTEGER PRIMARY KEY,
+                    codec TEXT,
+                    data BLOB,
+                    created_at REAL
+                );
+                """
+            )
+            if self.train_after and self._latest_dictionary_id(cursor) is not None:
+                self.train_after = None
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        """Load a stored dictionary, caching it for later pages.
+        
+        Args:
+            dictionary_id (int): Dictionary ID, or None for no dictionary.
+        
+        Returns:
+            bytes: Dictionary contents, or None.
+        """
+        if dictionary_id is None:
+            return None
+        if dictionary_id not in self._dictionaries:
+            conn = sqlite3.connect(self.path)
+            row = conn.execute(
+                "SELECT data FROM archive_dictionaries WHERE dictionary_id = ?;",
+                (dictionary_id,)).fetchone()
+            conn.close()
+            self._dictionaries[dictionary_id] = row[0] if row else None
+
+        return self._dictionaries[dictionary_id]
+
+    def _latest_dictionary_id(self, cursor: sqlite3.Cursor) -> int:
+        """Get the newest dictionary built for the archive's codec.
+        
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the archive database.
+        
+        Returns:
+            int: Dictionary ID, or None if none has been built.
+        """
+        cursor.execute(
+            "SELECT MAX(dictionary_id) FROM archive_dictionaries WHERE codec = ?;",
+            (self.codec,))
+        return cursor.fetchone()[0]
+
+    def _compress(self, html: str, dictionary_id: int) -> bytes:
+        """Compress page HTML with the archive's codec.
+        
+        Args:
+            html (str): Raw page HTML.
+            dictionary_id (int): Dictionary to compress with, or None.
+        
+        Returns:
+            bytes: Compressed page.
+        """
+        data = html.encode('utf-8')
+        if self.codec == "zstd":
+            dictionary = self._dictionary(dictionary_id)
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data).compress(data)
+
+        return zlib.compress(data, ZLIB_LEVEL)
+
+    def _decompress(self, blob: bytes, codec: str, dictionary_id: int) -> str:
+        """Decompress a stored page.
+        
+        Args:
+            blob (bytes): Compressed page.
+            codec (str): Codec the page was stored with.
+            dictionary_id (int): Dictionary the page was compressed with, or None.
+        
+        Returns:
+            str: Raw page HTML.
+        
+        Raises:
+            ValueError: If the page needs zstandard and it is not installed.
+        """
+        if codec == "zstd":
+            if zstandard is None:
+                raise ValueError("Archived page was stored with zstd; install zstandard to read it")
+            dictionary = self._dictionary(dictionary_id)
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            data = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(blob)
+        else:
+            data = zlib.decompress(blob)
+
+        return data.decode('utf-8')
+
+    def add_page(self, query: str, page_number: int, html: str, fetched_at: float = None) -> None:
+        """Compress and store one fetched page.
+        
+        Args:
+            query (str): Search query the page belongs to.
+            page_number (int): Results page number.
+            html (str): Raw page HTML.
+            fetched_at (float, optional): Fetch time as a Unix timestamp.
+                Defaults to now.
+        """
+        try:
+            conn = sqlite3.connect(self.path)
+            cursor = conn.cursor()
+            dictionary_id = self._latest_dictionary_id(cursor)
+            cursor.execute(
+                """
+                INSERT INTO archived_pages VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                (query, page_number, fetched_at or time.time(), self.codec, dictionary_id,
+                 self._compress(html, dictionary_id))
+            )
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+        if self.train_after:
+            self._train_when_ready()
+
+    def _train_when_ready(self) -> None:
+        """Build the first shared dictionary once train_after pages are stored."""
+        with self._train_lock:
+            if not self.train_after:
+                return
+            conn = sqlite3.connect(self.path)
+            page_count = conn.execute("SELECT COUNT(*) FROM archived_pages;").fetchone()[0]
+            conn.close()
+            if page_count < self.train_after:
+                return
+
+            self.train_after = None
+            try:
+                dictionary_id = self.build_dictionary()
+            except zstandard.ZstdError as e:
+                print(f"Unable to train an archive dictionary: {e}")
+                return
+            print(f"Trained archive dictionary {dictionary_id} on {min(page_count, DICTIONARY_SAMPLES)} pages")
+
+    def get_page(self, query: str, page_number: int, before: float = None) -> str:
+        """Read the latest stored fetch of a page.
+        
+        Args:
+            query (str): Search query the page belongs to.
+            page_number (int): Results page number.
+            before (float, optional): Only consider fetches at or before
+                this Unix timestamp.
+        
+        Returns:
+            str: Raw page HTML, or None if the page was never archived.
+        """
+        try:
+            conn = sqlite3.connect(self.path)
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT html, codec, dictionary_id
+                FROM archived_pages
+                WHERE query = ? AND page_number = ? AND fetched_at <= ?
+                ORDER BY fetched_at DESC
+                LIMIT 1;
+                """,
+                (query, page_number, before if before is not None else float('inf')))
+            row = cursor.fetchone()
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+            row = None
+
+        return self._decompress(*row) if row else None
+
+    def iter_pages(self, query: str, before: float = None) -> tuple:
+        """Stream the latest stored fetch of every page of a query.
+        
+        Pages are decompressed one at a time, so memory use does not
+        grow with the size of the archive.
+        
+        Args:
+            query (str): Search query to read.
+            before (float, optional): Only consider fetches at or before
+                this Unix timestamp.
+        
+        Yields:
+            tuple: (page_number, fetched_at, html) in page order.
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(
+                """
+                SELECT page_number, fetched_at, html, codec, dictionary_id
+                FROM archived_pages AS pages
+                WHERE query = ? AND fetched_at = (
+                    SELECT MAX(fetched_at) FROM archived_pages
+                    WHERE query = pages.query AND page_number = pages.page_number
+                    AND fetched_at <= ?
+                )
+                ORDER BY page_number;
+                """,
+                (query, before if before is not None else float('inf')))
+            for page_number, fetched_at, blob, codec, dictionary_id in cursor:
+                yield page_number, fetched_at, self._decompress(blob, codec, dictionary_id)
+        finally:
+            conn.close()
+
+    def get_queries(self) -> list:
+        """List the archived queries.
+        
+        Returns:
+            list: Tuples of (query, page_count, last_fetched_at), by query.
+        """
+        try:
+            conn = sqlite3.connect(self.path)
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT query, COUNT(DISTINCT page_number), MAX(fetched_at)
+                FROM archived_pages
+                GROUP BY query
+                ORDER BY query;
+                """)
+            queries = cursor.fetchall()
+            conn.commit()
+            conn.close()
+
+            return queries
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return []
+
+    def build_dictionary(self, samples: int = DICTIONARY_SAMPLES) -> int:
+        """Train a shared zstd dictionary on recently archived pages.
+        
+        Pages stored afterwards are compressed with the new dictionary;
+        pages already stored keep the dictionary they were written with.
+        
+        Args:
+            samples (int): Number of recent pages to train on.
+        
+        Returns:
+            int: ID of the new dictionary, or None if the archive is empty.
+        
+        Raises:
+            ValueError: If the archive does not use the zstd codec.
+        """
+        if self.codec != "zstd":
+            raise ValueError("Shared dictionaries need the zstd codec")
+
+        conn = sqlite3.connect(self.path)
+        rows = conn.execute(
+            """
+            SELECT html, codec, dictionary_id FROM archived_pages
+            ORDER BY fetched_at DESC LIMIT ?;
+            """,
+            (samples,)).fetchall()
+        conn.close()
+        pages = [self._decompress(*row).encode('utf-8') for row in rows]
+        if not pages:
+            return None
+
+        data = zstandard.train_dictionary(DICTIONARY_SIZE, pages).as_bytes()
+
+        try:
+            conn = sqlite3.connect(self.path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO archive_dictionaries (codec, data, created_at) VALUES (?, ?, ?);",
+                (self.codec, data, time.time()))
+            dictionary_id = cursor.lastrowid
+            conn.commit()
+            conn.close()
+
+            return dictionary_id
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return None
@@ -0,0 +1,41 @@
+"""authors.py - Author name canonicalization.
+
+Converts the author text found on search result cards and in embedded
+search state into the canonical "Last, First" form stored in the
+database. The same few hundred authors repeat across pages and queries,
+so canonical forms are memoized in a bounded LRU cache keyed by the raw
+string.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+from functools import lru_cache
+import re
+
+AUTHOR_CACHE_SIZE = 4096
+
+_INITIAL_SPACING = re.compile(r'\.\s+')
+
+@lru_cache(maxsize=AUTHOR_CACHE_SIZE)
+def canonical_author(raw: str) -> str:
+    """Convert raw author text into canonical "Last, First" form.
+    
+    Spaces are removed from the last name and the spacing between
+    initials is collapsed, so "Tolkien, J. R. R." and "Tolkien, J.R.R."
+    map to the same author.
+    
+    Args:
+        raw (str): Author text, e.g. "Tolkien, J. R. R.".
+    
+    Returns:
+        str: Canonical author name, e.g. "Tolkien, J.R.R.", or None if
+            the text has no "Last, First" separator.
+    """
+    if not raw or ',' not in raw:
+        return None
+    last, first = raw.split(",", 1)
+    last = last.replace(" ", "")
+    first = _INITIAL_SPACING.sub('.', first.strip())
+    return f"{last}, {first}"
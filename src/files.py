@@ -82,4 +82,23 @@ def export_as_csv(library_db: LibraryDB) -> None:
             writer.writerow(library_db.get_all_library_items())
     
     except Exception as e:
-        print(f"Error writing to file: {e}")
\ No newline at end of file
+        print(f"Error writing to file: {e}")
+
+def export_by_query(library_db: LibraryDB) -> None:
+    """Export all library items to CSV format, tagged with their query.
+    
+    Used by batch runs, where one database holds the results of many
+    queries. Each row starts with the query that found the item.
+    
+    Args:
+        library_db (LibraryDB): Database instance containing library data.
+    """
+    try:
+        with open("results/library_items_by_query.csv", "w", newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["query", "title", "author", "format", "pub_year", "rating",
+                             "num_ratings", "bayesian_avg_rating", "link"])
+            writer.writerows(library_db.get_items_by_query())
+    
+    except Exception as e:
+        print(f"Error writing to file: {e}")
@@ -9,8 +9,17 @@ __author__ = "Abiola Raji"
 __version__ = "1.0"
 __date__ = "2025-09-03"
 
+import json
 import sqlite3
 import sys
+import threading
+import time
+import zlib
+
+PARSE_CACHE_SIZE = 10000
+RESPONSE_CACHE_SIZE = 50000
+RESPONSE_CACHE_TTL = 24 * 60 * 60
+CACHE_EVICT_FRACTION = 0.1
 
 class Book:
     """Represents a library book with metadata.
@@ -53,19 +62,33 @@ class LibraryDB:
     retrieval, and statistical analysis of library book data.
     """
     
-    def create_table(self) -> None:
-        """Create or recreate the library_items table.
+    def create_table(self, reset: bool = True) -> None:
+        """Create or recreate the library_items and scrape_checkpoints tables.
+        
+        Drops existing tables if present and creates a fresh table schema
+        with columns for book metadata and calculated ratings, plus the
+        per-page checkpoints and the partition plans used to resume
+        interrupted scrapes. Items are
+        stored once per catalog link; the query_items table records which
+        queries found each item. The authors table is never reset, so
+        author IDs stay stable across runs, and neither is item_details,
+        so enriched items are not refetched on every run.
         
-        Drops existing table if present and creates a fresh table schema
-        with columns for book metadata and calculated ratings.
+        Args:
+            reset (bool): Drop existing tables first. Pass False to keep
+                stored items and checkpoints. Default True.
         """
         try:
             conn = sqlite3.connect('library.db')
             cursor = conn.cursor()
-            cursor.execute("DROP TABLE IF EXISTS library_items;")
+            if reset:
+                cursor.execute("DROP TABLE IF EXISTS library_items;")
+                cursor.execute("DROP TABLE IF EXISTS query_items;")
+                cursor.execute("DROP TABLE IF EXISTS scrape_checkpoints;")
+                cursor.execute("DROP TABLE IF EXISTS scrape_partitions;")
             cursor.execute(
                 """
-                CREATE TABLE library_items (
+                CREATE TABLE IF NOT EXISTS library_items (
                     title TEXT,
                     author TEXT,
                     format TEXT,
@@ -73,7 +96,95 @@ class LibraryDB:
                     rating REAL,
                     num_ratings INTEGER,
                     bayesian_avg_rating REAL,
-                    link TEXT
+                    link TEXT,
+                    author_id INTEGER
+                );
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS authors (
+                    author_id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE NOT NULL
+                );
+                """
+            )
+            cursor.execute("PRAGMA table_info(library_items);")
+            columns = {column[1] for column in cursor.fetchall()}
+            if 'author_id' not in columns:
+                # Table kept from before author IDs were stored; add and backfill them
+                cursor.execute("ALTER TABLE library_items ADD COLUMN author_id INTEGER;")
+                cursor.execute(
+                    """
+                    INSERT OR IGNORE INTO authors (name)
+                    SELECT DISTINCT author FROM library_items WHERE author IS NOT NULL;
+                    """
+                )
+                cursor.execute(
+                    """
+                    UPDATE library_items
+                    SET author_id = (SELECT author_id FROM authors WHERE name = library_items.author);
+                    """
+                )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS library_items_author_id ON library_items (author_id);"
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_items (
+                    query TEXT,
+                    link TEXT,
+                    PRIMARY KEY (query, link)
+                ) WITHOUT ROWID;
+                """
+            )
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'library_items_link';"
+            )
+            if cursor.fetchone() is None:
+                # Items stored before they were keyed on link; keep the first copy of each
+                cursor.execute(
+                    """
+                    DELETE FROM library_items
+                    WHERE link IS NOT NULL AND rowid NOT IN (
+                        SELECT MIN(rowid) FROM library_items GROUP BY link
+                    );
+                    """
+                )
+                cursor.execute("CREATE UNIQUE INDEX library_items_link ON library_items (link);")
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS item_details (
+                    link TEXT PRIMARY KEY,
+                    isbn TEXT,
+                    page_count INTEGER,
+                    subjects TEXT,
+                    series TEXT,
+                    language TEXT,
+                    enriched_at REAL
+                );
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+                    query TEXT,
+                    page_number INTEGER,
+                    item_count INTEGER,
+                    target_item_count INTEGER,
+                    PRIMARY KEY (query, page_number)
+                );
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_partitions (
+                    query TEXT,
+                    partition_by TEXT,
+                    search_key TEXT,
+                    filters TEXT,
+                    done INTEGER DEFAULT 0,
+                    PRIMARY KEY (query, search_key)
                 );
                 """
             )
@@ -88,14 +199,24 @@ class LibraryDB:
             sys.exit(1)
 
     def delete_table(self) -> None:
-        """Delete the library_items table from database.
+        """Delete every table this application creates from the database.
         
-        Used primarily for cleanup during testing.
+        Drops library_items, query_items, scrape_checkpoints,
+        scrape_partitions, authors and item_details, along with the
+        parse_cache and response_cache tables of ParseCache and
+        ResponseCache. Used primarily for cleanup during testing.
         """
         try:
             conn = sqlite3.connect('library.db')
             cursor = conn.cursor()
             cursor.execute("DROP TABLE IF EXISTS library_items;")
+            cursor.execute("DROP TABLE IF EXISTS query_items;")
+            cursor.execute("DROP TABLE IF EXISTS scrape_checkpoints;")
+            cursor.execute("DROP TABLE IF EXISTS scrape_partitions;")
+            cursor.execute("DROP TABLE IF EXISTS authors;")
+            cursor.execute("DROP TABLE IF EXISTS item_details;")
+            cursor.execute("DROP TABLE IF EXISTS parse_cache;")
+            cursor.execute("DROP TABLE IF EXISTS response_cache;")
             conn.commit()
             conn.close()
         
@@ -105,21 +226,297 @@ class LibraryDB:
                 conn.rollback()
                 conn.close()
 
+    def _insert_books(self, cursor: sqlite3.Cursor, books: list, query: str = None) -> None:
+        """Insert book records, registering any new authors first.
+        
+        Each row's author_id is resolved from the authors table in the
+        same statement, so no separate lookup round trip is needed. A
+        book whose link is already stored is not inserted again. Its
+        fields are refreshed from the new record, except those the new
+        record lacks, such as fields left out of a projection, and with
+        a query it gains a query_items row. Storage grows with distinct
+        items rather than with search hits.
+        
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the open transaction.
+            books (list): Book instances to insert.
+            query (str, optional): Search query the books are tagged with.
+        """
+        cursor.executemany(
+            "INSERT OR IGNORE INTO authors (name) VALUES (?);",
+            [(author,) for author in {book.author for book in books} if author is not None]
+        )
+        cursor.executemany(
+            """
+            INSERT INTO library_items
+                (title, author, format, pub_year, rating, num_ratings, link, author_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT author_id FROM authors WHERE name = ?))
+            ON CONFLICT (link) DO UPDATE SET
+                title = COALESCE(excluded.title, title),
+                author = COALESCE(excluded.author, author),
+                format = COALESCE(excluded.format, format),
+                pub_year = COALESCE(excluded.pub_year, pub_year),
+                rating = COALESCE(excluded.rating, rating),
+                num_ratings = COALESCE(excluded.num_ratings, num_ratings),
+                author_id = COALESCE(excluded.author_id, author_id);
+            """,
+            [(book.title, book.author, book.format, book.pub_year,
+              book.rating, book.num_ratings, book.link, book.author) for book in books]
+        )
+        if query is not None:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO query_items VALUES (?, ?);",
+                [(query, link) for link in {book.link for book in books} if link is not None]
+            )
+
     def add_library_item(self, book: Book) -> None:
         """Insert a book record into the database.
         
         Args:
             book (Book): Book instance containing metadata to insert.
         """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            self._insert_books(cursor, [book])
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def add_page(self, query: str, page_number: int, target_item_count: int, books: list,
+                 tag: str = None) -> None:
+        """Insert one scraped results page and checkpoint it atomically.
+        
+        The page's books and its checkpoint row are written in a single
+        transaction, so a page is either fully stored or not at all and
+        can safely be refetched after an interruption.
+        
+        Args:
+            query (str): Search query the page belongs to.
+            page_number (int): Results page number.
+            target_item_count (int): Total result count reported for the query.
+            books (list): Book instances parsed from the page.
+            tag (str, optional): Search query the books are tagged with.
+                Defaults to query; partitions of a search pass the
+                search's own query. Books stored before only gain the tag.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            self._insert_books(cursor, books, tag or query)
+            cursor.execute(
+                """
+                INSERT OR REPLACE INTO scrape_checkpoints VALUES (?, ?, ?, ?);
+                """,
+                (query, page_number, len(books), target_item_count)
+            )
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def get_scrape_progress(self, query: str) -> tuple:
+        """Get the checkpointed progress of a scrape.
+        
+        Args:
+            query (str): Search query to look up.
+            
+        Returns:
+            tuple: (target_item_count, completed_pages) where completed_pages
+                is a set of page numbers, or (None, set()) if nothing is stored.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT page_number, target_item_count
+                FROM scrape_checkpoints
+                WHERE query = ?;
+                """,
+                (query,))
+            checkpoints = cursor.fetchall()
+            conn.commit()
+            conn.close()
+
+            if not checkpoints:
+                return None, set()
+            return checkpoints[0][1], {page_number for page_number, _ in checkpoints}
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return None, set()
+
+    def get_scrape_queries(self) -> list:
+        """List the queries, or partition keys, that have stored checkpoints.
+        
+        Returns:
+            list: Query strings in alphabetical order, or an empty list if
+                error occurs.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT query FROM scrape_checkpoints ORDER BY query;")
+            queries = [query for query, in cursor.fetchall()]
+            conn.commit()
+            conn.close()
+
+            return queries
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return []
+
+    def add_scrape_partitions(self, query: str, partition_by: str, partitions: list) -> None:
+        """Record the partitions a search is split into before crawling them.
+        
+        Partitions already recorded for the query keep their done flag.
+        
+        Args:
+            query (str): Search query being partitioned.
+            partition_by (str): Facet the query is partitioned by.
+            partitions (list): (search_key, filters) of each partition.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT OR IGNORE INTO scrape_partitions (query, partition_by, search_key, filters)
+                VALUES (?, ?, ?, ?);
+                """,
+                [(query, partition_by, key, json.dumps(filters)) for key, filters in partitions]
+            )
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def set_scrape_partition_done(self, query: str, search_key: str) -> None:
+        """Mark a partition of a search as completely stored.
+        
+        Args:
+            query (str): Search query the partition belongs to.
+            search_key (str): Key of the partition.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE scrape_partitions SET done = 1 WHERE query = ? AND search_key = ?;",
+                (query, search_key)
+            )
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def get_scrape_partitions(self, query: str, partition_by: str) -> list:
+        """Get the recorded partitions of a search.
+        
+        Args:
+            query (str): Search query to look up.
+            partition_by (str): Facet the query was partitioned by.
+        
+        Returns:
+            list: (search_key, filters, done) tuples in the order they were
+                planned, or an empty list if none are recorded.
+        """
         try:
             conn = sqlite3.connect('library.db')
             cursor = conn.cursor()
             cursor.execute(
                 """
-                INSERT INTO library_items VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                SELECT search_key, filters, done FROM scrape_partitions
+                WHERE query = ? AND partition_by = ?
+                ORDER BY rowid;
                 """,
-                (book.title, book.author, book.format, book.pub_year, 
-                book.rating, book.num_ratings, None, book.link)
+                (query, partition_by))
+            partitions = [(key, json.loads(filters), bool(done)) for key, filters, done in cursor.fetchall()]
+            conn.commit()
+            conn.close()
+
+            return partitions
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return []
+
+    def get_author_id(self, author: str) -> int:
+        """Get the stable integer ID assigned to an author.
+        
+        Args:
+            author (str): Canonical author name.
+            
+        Returns:
+            int: Author ID, or None if the author has not been stored.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute("SELECT author_id FROM authors WHERE name = ?;", (author,))
+            row = cursor.fetchone()
+            conn.commit()
+            conn.close()
+
+            return row[0] if row else None
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return None
+
+    def add_item_details(self, details: dict, enriched_at: float = None) -> None:
+        """Store the detail page fields of several items in one transaction.
+        
+        Args:
+            details (dict): Item link -> dict of parser.DETAIL_FIELDS values.
+            enriched_at (float, optional): Enrichment time as a Unix
+                timestamp. Defaults to now.
+        """
+        enriched_at = enriched_at or time.time()
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO item_details VALUES (?, ?, ?, ?, ?, ?, ?);",
+                [(link, fields.get('isbn'), fields.get('page_count'),
+                  json.dumps(fields['subjects']) if fields.get('subjects') is not None else None,
+                  fields.get('series'), fields.get('language'), enriched_at)
+                 for link, fields in details.items()]
             )
             conn.commit()
             conn.close()
@@ -130,6 +527,80 @@ class LibraryDB:
                 conn.rollback()
                 conn.close()
 
+    def get_item_details(self, link: str) -> dict:
+        """Get the stored detail page fields of an item.
+        
+        Args:
+            link (str): Catalog link of the item.
+            
+        Returns:
+            dict: isbn, page_count, subjects (list), series, language and
+                enriched_at, or None if the item was never enriched.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT isbn, page_count, subjects, series, language, enriched_at
+                FROM item_details WHERE link = ?;
+                """,
+                (link,))
+            row = cursor.fetchone()
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+            row = None
+
+        if row is None:
+            return None
+        isbn, page_count, subjects, series, language, enriched_at = row
+        return {'isbn': isbn, 'page_count': page_count,
+                'subjects': json.loads(subjects) if subjects is not None else None,
+                'series': series, 'language': language, 'enriched_at': enriched_at}
+
+    def get_links_to_enrich(self, max_age: float = None) -> list:
+        """List stored items whose detail fields are missing or stale.
+        
+        Args:
+            max_age (float, optional): Items enriched within this many
+                seconds are skipped. Default None skips every enriched item.
+            
+        Returns:
+            list: Catalog links in storage order, or an empty list if error occurs.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT library_items.link
+                FROM library_items
+                LEFT JOIN item_details ON item_details.link = library_items.link
+                WHERE library_items.link IS NOT NULL
+                AND (item_details.enriched_at IS NULL OR item_details.enriched_at < ?)
+                ORDER BY library_items.rowid;
+                """,
+                (time.time() - max_age if max_age is not None else float('-inf'),))
+            links = [link for link, in cursor.fetchall()]
+            conn.commit()
+            conn.close()
+
+            return links
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return []
+
     def set_weighted_averages(self) -> None:
         """Calculate and update Bayesian weighted average ratings.
         
@@ -184,7 +655,12 @@ class LibraryDB:
         try:
             conn = sqlite3.connect('library.db')
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM library_items;")
+            cursor.execute(
+                """
+                SELECT title, author, format, pub_year, rating,
+                num_ratings, bayesian_avg_rating, link
+                FROM library_items;
+                """)
             library_items = cursor.fetchall()
             conn.commit()
             conn.close()
@@ -198,16 +674,22 @@ class LibraryDB:
                 conn.close()
             sys.exit(1)
 
-    def get_item_count(self) -> int:
+    def get_item_count(self, query: str = None) -> int:
         """Get total number of items in database.
         
+        Args:
+            query (str, optional): Only count items found by this query.
+        
         Returns:
             int: Count of library items, or None if error occurs.
         """
         try:
             conn = sqlite3.connect('library.db')
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM library_items;")
+            if query is None:
+                cursor.execute("SELECT COUNT(*) FROM library_items;")
+            else:
+                cursor.execute("SELECT COUNT(*) FROM query_items WHERE query = ?;", (query,))
             item_count = cursor.fetchone()[0]
             conn.commit()
             conn.close()
@@ -222,6 +704,42 @@ class LibraryDB:
             
             return None
 
+    def get_items_by_query(self) -> list:
+        """Retrieve all library items tagged with the query that found them.
+        
+        An item found by several queries is listed once per query. Items
+        without a catalog link cannot be matched across queries and are
+        not tagged.
+        
+        Returns:
+            list: Tuples of (query, title, author, format, pub_year, rating,
+                num_ratings, bayesian_avg_rating, link), ordered by query.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT query_items.query, title, author, format, pub_year, rating,
+                num_ratings, bayesian_avg_rating, library_items.link
+                FROM query_items
+                JOIN library_items ON library_items.link = query_items.link
+                ORDER BY query_items.query, library_items.rowid;
+                """)
+            library_items = cursor.fetchall()
+            conn.commit()
+            conn.close()
+
+            return library_items
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+            return []
+
     def get_frequent_authors(self) -> list:
         """Get authors with most books in collection.
         
@@ -233,12 +751,15 @@ class LibraryDB:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT author,
-                COUNT(author) as author_count
-                FROM library_items
-                WHERE author IS NOT NULL
-                GROUP BY author
-                ORDER BY author_count DESC;
+                SELECT authors.name, counts.author_count
+                FROM (
+                    SELECT author_id, COUNT(*) as author_count
+                    FROM library_items
+                    WHERE author_id IS NOT NULL
+                    GROUP BY author_id
+                ) AS counts
+                JOIN authors USING (author_id)
+                ORDER BY counts.author_count DESC, authors.name;
                 """)
             top_authors = cursor.fetchmany(20)
             conn.commit()
@@ -389,11 +910,15 @@ class LibraryDB:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT author, ROUND(AVG(rating), 2) as avg_rating
-                FROM library_items
-                WHERE rating IS NOT NULL
-                GROUP BY author
-                ORDER BY avg_rating DESC;
+                SELECT authors.name, averages.avg_rating
+                FROM (
+                    SELECT author_id, ROUND(AVG(rating), 2) as avg_rating
+                    FROM library_items
+                    WHERE rating IS NOT NULL
+                    GROUP BY author_id
+                ) AS averages
+                LEFT JOIN authors USING (author_id)
+                ORDER BY averages.avg_rating DESC;
                 """)
             top_authors = cursor.fetchmany(10)
             conn.commit()
@@ -420,11 +945,15 @@ class LibraryDB:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT author, bayesian_avg_rating
-                FROM library_items
-                WHERE bayesian_avg_rating IS NOT NULL
-                GROUP BY author
-                ORDER BY bayesian_avg_rating DESC;
+                SELECT authors.name, ratings.bayesian_avg_rating
+                FROM (
+                    SELECT author_id, bayesian_avg_rating
+                    FROM library_items
+                    WHERE bayesian_avg_rating IS NOT NULL
+                    GROUP BY author_id
+                ) AS ratings
+                LEFT JOIN authors USING (author_id)
+                ORDER BY ratings.bayesian_avg_rating DESC;
                 """)
             top_books = cursor.fetchmany(10)
             conn.commit()
@@ -470,6 +999,305 @@ class LibraryDB:
             
             return None
 
+def _evict_oldest(cursor: sqlite3.Cursor, table: str, key: str, order: str,
+                  max_entries: int) -> int:
+    """Trim a cache table once it holds more than max_entries rows.
+    
+    The oldest rows by the order column are deleted through its index,
+    down to CACHE_EVICT_FRACTION below the cap, so a cache evicts in
+    batches rather than sorting its table after every insert. The
+    caches count their inserts in memory and only call this once that
+    count passes the cap.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open transaction.
+        table (str): Cache table name.
+        key (str): Primary key column of the table.
+        order (str): Indexed column ordering rows from oldest to newest.
+        max_entries (int): Maximum number of rows kept.
+        
+    Returns:
+        int: Number of rows left in the table.
+    """
+    cursor.execute(f"SELECT COUNT(*) FROM {table};")
+    entries = cursor.fetchone()[0]
+    if entries <= max_entries:
+        return entries
+
+    keep = max_entries - int(max_entries * CACHE_EVICT_FRACTION)
+    cursor.execute(
+        f"DELETE FROM {table} WHERE {key} IN (SELECT {key} FROM {table} ORDER BY {order} LIMIT ?);",
+        (entries - keep,))
+    return keep
+
+class ParseCache:
+    """SQLite-backed cache of parsed search pages.
+    
+    Maps a fingerprint of a page's result markup to the records extracted
+    from it, so pages that are unchanged between runs skip parsing. The
+    cache lives in its own table that create_table() leaves alone, and
+    the least recently used entries are evicted beyond max_entries, see
+    _evict_oldest.
+    """
+
+    def __init__(self, max_entries: int = PARSE_CACHE_SIZE):
+        """Initialize the cache and create its table if needed.
+        
+        Args:
+            max_entries (int): Maximum number of cached pages. Default PARSE_CACHE_SIZE.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = 0
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS parse_cache (
+                    page_hash TEXT PRIMARY KEY,
+                    target_item_count INTEGER,
+                    records TEXT,
+                    last_used REAL
+                );
+                """
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS parse_cache_last_used ON parse_cache (last_used);"
+            )
+            cursor.execute("SELECT COUNT(*) FROM parse_cache;")
+            self._entries = cursor.fetchone()[0]
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def get(self, page_hash: str) -> tuple:
+        """Look up the parsed result for a page fingerprint.
+        
+        Args:
+            page_hash (str): Fingerprint of the page's result markup.
+            
+        Returns:
+            tuple: (target_item_count, records) with records as tuples, or
+                None on a cache miss.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT target_item_count, records FROM parse_cache WHERE page_hash = ?;",
+                (page_hash,))
+            row = cursor.fetchone()
+            if row is not None:
+                cursor.execute(
+                    "UPDATE parse_cache SET last_used = ? WHERE page_hash = ?;",
+                    (time.time(), page_hash))
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return row[0], [tuple(record) for record in json.loads(row[1])]
+
+    def put(self, page_hash: str, target_item_count: int, records: list) -> None:
+        """Store the parsed result for a page and evict old entries.
+        
+        Args:
+            page_hash (str): Fingerprint of the page's result markup.
+            target_item_count (int): Result count read from the page.
+            records (list): Field tuples extracted from the page.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?);",
+                (page_hash, target_item_count, json.dumps(records), time.time()))
+            self._entries += 1
+            if self._entries > self.max_entries:
+                self._entries = _evict_oldest(cursor, 'parse_cache', 'page_hash', 'last_used',
+                                              self.max_entries)
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def clear(self) -> None:
+        """Remove every cached page."""
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM parse_cache;")
+            self._entries = 0
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+class ResponseCache:
+    """SQLite-backed cache of fetched item detail pages.
+    
+    Keeps the compressed body of every detail page fetched by enrichment,
+    keyed by URL, so a page fetched recently enough is read back instead
+    of being requested again, for example when enrichment is rerun after
+    an interruption or after item_details was cleared. Pages expire
+    after their own ttl, separate from how long enriched details stay
+    fresh. Like ParseCache it lives in its own table that create_table()
+    leaves alone, and the least recently fetched entries are evicted
+    beyond max_entries, see _evict_oldest. The hit and miss counters may
+    be updated from several fetch threads at once.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        """Initialize the cache and create its table if needed.
+        
+        Args:
+            max_entries (int): Maximum number of cached pages. Default RESPONSE_CACHE_SIZE.
+            ttl (float): Seconds a cached page is served for, or None to
+                keep serving it until evicted. Default RESPONSE_CACHE_TTL.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = 0
+        self._lock = threading.Lock()
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    url TEXT PRIMARY KEY,
+                    body BLOB,
+                    fetched_at REAL
+                );
+                """
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS response_cache_fetched_at ON response_cache (fetched_at);"
+            )
+            cursor.execute("SELECT COUNT(*) FROM response_cache;")
+            self._entries = cursor.fetchone()[0]
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def get(self, url: str, max_age: float = None) -> str:
+        """Look up the cached body of a page.
+        
+        Args:
+            url (str): Page URL.
+            max_age (float, optional): Ignore entries fetched more than this
+                many seconds ago. Defaults to the cache's ttl.
+            
+        Returns:
+            str: Page body, or None on a cache miss.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT body FROM response_cache WHERE url = ? AND fetched_at >= ?;",
+                (url, time.time() - max_age if max_age is not None else 0))
+            row = cursor.fetchone()
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, url: str, body: str) -> None:
+        """Store the body of a fetched page and evict old entries.
+        
+        Args:
+            url (str): Page URL.
+            body (str): Page body.
+        """
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?);",
+                (url, zlib.compress(body.encode('utf-8')), time.time()))
+            with self._lock:
+                self._entries += 1
+                evict = self._entries > self.max_entries
+            if evict:
+                entries = _evict_oldest(cursor, 'response_cache', 'url', 'fetched_at',
+                                        self.max_entries)
+                with self._lock:
+                    self._entries = entries
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def clear(self) -> None:
+        """Remove every cached page."""
+        try:
+            conn = sqlite3.connect('library.db')
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM response_cache;")
+            with self._lock:
+                self._entries = 0
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Database error: {e}")
+            if conn:
+                conn.rollback()
+                conn.close()
+
 def prettify(data):
     """Convert list of tuples into formatted ASCII table.
     
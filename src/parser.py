@@ -0,0 +1,652 @@
+"""parser.py - Search result page parsing for the library catalog.
+
+Extracts book metadata and the total result count from Calgary Public
+Library search result pages. The default extractor slices out the result
+list and pagination label, builds an lxml tree for just that markup and
+walks each result card once. Pages that embed their search results as
+JSON application state are decoded directly instead. The original BeautifulSoup extractor is kept
+as a reference implementation for benchmarking and cross-checking. Item
+detail pages are parsed for the fields that result cards do not show.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+from bs4 import BeautifulSoup
+from lxml import etree, html
+from .library_db import Book
+from .authors import canonical_author
+from functools import lru_cache
+import hashlib
+import json
+import re
+
+# Bump whenever a parser change alters the records extracted from a page,
+# so fingerprints change and pages cached by an older parser are reparsed
+PARSER_VERSION = 1
+
+RESULT_CARD_CLASS = 'cp-search-result-item-content'
+PAGINATION_CLASS = 'cp-pagination-label'
+
+_CARDS_XPATH = etree.XPath(
+    f"//div[contains(concat(' ', normalize-space(@class), ' '), ' {RESULT_CARD_CLASS} ')]")
+_PAGINATION_XPATH = etree.XPath(
+    f"//span[contains(concat(' ', normalize-space(@class), ' '), ' {PAGINATION_CLASS} ')]")
+_TAG = re.compile(r'<[^>]+>')
+_STATE_SCRIPT = re.compile(
+    r'<script\b[^>]*\btype="application/json"[^>]*>(.*?)</script>', re.DOTALL)
+_YEAR = re.compile(r'\d{4}')
+_ISBN = re.compile(r'\d{12}[\dX]|\d{9}[\dX]')
+_PAGE_COUNT = re.compile(r'(\d+)\s*(?:pages|p\.)')
+_RECORD_ID = re.compile(r'/record/([^/?#]+)')
+
+# BiblioCommons format codes -> labels shown on the result cards
+STATE_FORMAT_LABELS = {
+    'BK': 'Book',
+    'EBOOK': 'eBook',
+    'GRAPHIC_NOVEL': 'Graphic Novel',
+    'LPRINT': 'Large Print',
+    'BOARD_BK': 'Board Book',
+    'PAPERBACK': 'Paperback',
+}
+
+# Book attributes in library_items column order, the names accepted as a field projection
+BOOK_FIELDS = ('title', 'author', 'format', 'pub_year', 'rating', 'num_ratings', 'link')
+
+# Book attribute -> card elements its value is read from
+_FIELD_ELEMENTS = {
+    'title': ('title', 'subtitle'),
+    'author': ('author',),
+    'format': ('info',),
+    'pub_year': ('info',),
+    'rating': ('rating', 'rating_count'),
+    'num_ratings': ('rating', 'rating_count'),
+    'link': ('link',),
+}
+
+# Class token -> (tag, field) for the elements read from each result card
+_CARD_FIELDS = {
+    'title-content': ('span', 'title'),
+    'cp-subtitle': ('span', 'subtitle'),
+    'author-link': ('a', 'author'),
+    'display-info-primary': ('span', 'info'),
+    'cp-rating-stars': ('span', 'rating'),
+    'rating-count': ('span', 'rating_count'),
+    'cp-title': ('h2', 'link'),
+}
+
+# Item detail fields, stored by enrichment in the item_details table
+DETAIL_FIELDS = ('isbn', 'page_count', 'subjects', 'series', 'language')
+
+# Detail field -> keys of a detail page's bib entity that may hold it
+_DETAIL_STATE_KEYS = {
+    'isbn': ('isbns', 'isbn'),
+    'page_count': ('physicalDescription', 'pages'),
+    'subjects': ('subjects', 'subjectHeadings'),
+    'series': ('series', 'seriesTitle'),
+    'language': ('primaryLanguage', 'language'),
+}
+
+# Lowercased detail page label -> detail field
+_DETAIL_LABELS = {
+    'isbn': 'isbn',
+    'characteristics': 'page_count',
+    'physical description': 'page_count',
+    'subjects': 'subjects',
+    'subject': 'subjects',
+    'series': 'series',
+    'language': 'language',
+}
+
+def normalize_fields(fields) -> tuple:
+    """Validate a field projection and put it in column order.
+    
+    Args:
+        fields (iterable): Book attribute names to extract, or None for all.
+    
+    Returns:
+        tuple: Requested names in BOOK_FIELDS order, or None for all fields.
+    
+    Raises:
+        ValueError: If a name is not one of BOOK_FIELDS.
+    """
+    if fields is None:
+        return None
+    fields = set(fields)
+    unknown = fields.difference(BOOK_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown book fields: {', '.join(sorted(unknown))}")
+    return tuple(field for field in BOOK_FIELDS if field in fields)
+
+@lru_cache(maxsize=None)
+def _card_fields(fields: tuple) -> tuple:
+    """Narrow _CARD_FIELDS to the elements a projection needs.
+    
+    Args:
+        fields (tuple): Normalized projection, or None for all fields.
+    
+    Returns:
+        tuple: (card_fields, element_count) where card_fields maps class
+            token -> (tag, field) for the elements to look for.
+    """
+    if fields is None:
+        return _CARD_FIELDS, len(_CARD_FIELDS)
+    wanted = {element for field in fields for element in _FIELD_ELEMENTS[field]}
+    return {token: match for token, match in _CARD_FIELDS.items() if match[1] in wanted}, len(wanted)
+
+def _parse_count_text(text: str) -> int:
+    """Read the total from pagination text such as "1 to 20 of 1,234 results".
+    
+    Args:
+        text (str): Pagination label text.
+    
+    Returns:
+        int: Total number of results, or 0 if the text cannot be read.
+    """
+    try:
+        return int(text.split()[4].replace(',',''))
+    except:
+        return 0
+
+def _extract_card(card, fields: tuple = None) -> Book:
+    """Extract the fields of one result card in a single pass.
+    
+    Walks the card's descendants once and dispatches on their class
+    tokens through _CARD_FIELDS, keeping only the first match for each
+    field so the output matches the BeautifulSoup extractor's find() calls.
+    With a projection only the elements behind the requested fields are
+    looked for, the walk stops once all of them are found, and the
+    other fields are left as None.
+    
+    Args:
+        card (lxml.html.HtmlElement): Result card element.
+        fields (tuple, optional): Normalized projection, None for all fields.
+    
+    Returns:
+        Book: Book populated with whatever fields the card provides.
+    """
+    card_fields, element_count = _card_fields(fields)
+    elements = {}
+    for element in card.iter(etree.Element):
+        classes = element.get('class')
+        if not classes:
+            continue
+        for token in classes.split():
+            match = card_fields.get(token)
+            if match and match[0] == element.tag and match[1] not in elements:
+                elements[match[1]] = element
+        if len(elements) == element_count:
+            break
+    fields = fields or BOOK_FIELDS
+
+    def text(field):
+        element = elements.get(field)
+        return element.text_content() if element is not None else None
+
+    title, subtitle, author, info = text('title'), text('subtitle'), text('author'), text('info')
+    rating, rating_count, link = elements.get('rating'), text('rating_count'), elements.get('link')
+
+    book = Book(title=title)
+    if title is not None and subtitle is not None:
+        book.title += f": {subtitle}"
+    if 'author' in fields:
+        book.author = canonical_author(author)
+    try:
+        if 'format' in fields:
+            book.format = info.split(', ')[0]
+    except:
+        pass
+    try:
+        if 'pub_year' in fields:
+            book.pub_year = int(info.split(', ')[1])
+            if book.pub_year < 1000:
+                book.pub_year = None
+    except:
+        pass
+    try:
+        if 'rating' in fields or 'num_ratings' in fields:
+            average = float(rating.find('.//span').text_content().split(' ')[2])
+            if 'rating' in fields:
+                book.rating = average
+            if 'num_ratings' in fields:
+                book.num_ratings = int(rating_count.strip('(,)').split(' ')[0].replace(',',''))
+    except:
+        pass
+    try:
+        book.link = link.find('.//a').get('href')
+    except:
+        pass
+
+    return book
+
+def _find_class_tag(library_html: str, tag: str, class_token: str, start: int = 0,
+                    last: bool = False) -> int:
+    """Find an opening tag carrying a class token with plain string searches.
+    
+    Much cheaper than a regular expression over the whole page, since
+    only the places where the class token occurs are inspected.
+    
+    Args:
+        library_html (str): Raw HTML to search.
+        tag (str): Tag name, e.g. "div".
+        class_token (str): Class the tag must carry.
+        start (int): Offset to search from. Default 0.
+        last (bool): Find the last such tag instead of the first. Default False.
+    
+    Returns:
+        int: Offset of the tag's "<", or -1 if there is none.
+    """
+    end = len(library_html)
+    while True:
+        if last:
+            position = library_html.rfind(class_token, start, end)
+        else:
+            position = library_html.find(class_token, start)
+        if position < 0:
+            return -1
+
+        tag_start = library_html.rfind('<', 0, position)
+        after = position + len(class_token)
+        if (library_html.startswith(tag, tag_start + 1)
+                and library_html[tag_start + 1 + len(tag)].isspace()
+                and library_html[position - 1] in ' "\t\n'
+                and after < len(library_html) and library_html[after] in ' "\t\n'
+                and 'class="' in library_html[tag_start:position]
+                and '>' not in library_html[tag_start:position]):
+            return tag_start
+
+        if last:
+            end = position
+        else:
+            start = after
+
+def _slice_results(library_html: str) -> tuple:
+    """Cut the result count and the result card markup out of a page.
+    
+    Headers, facets, scripts and footers are never parsed: the count is
+    read straight from the pagination label and only the markup from the
+    first result card up to the pagination label that follows the last
+    card (or the end of the page) is kept for tree building.
+    
+    Args:
+        library_html (str): Raw HTML of a search results page.
+    
+    Returns:
+        tuple: (target_item_count, card_markup) where card_markup is None
+            if the page has no result cards.
+    """
+    target_item_count = 0
+    label = _find_class_tag(library_html, 'span', PAGINATION_CLASS)
+    if label >= 0:
+        text_start = library_html.find('>', label) + 1
+        text_end = library_html.find('</span>', text_start)
+        if text_end >= 0:
+            target_item_count = _parse_count_text(_TAG.sub('', library_html[text_start:text_end]))
+
+    first = _find_class_tag(library_html, 'div', RESULT_CARD_CLASS)
+    if first < 0:
+        return target_item_count, None
+
+    last = _find_class_tag(library_html, 'div', RESULT_CARD_CLASS, first, last=True)
+    end = _find_class_tag(library_html, 'span', PAGINATION_CLASS, last + 1)
+
+    return target_item_count, library_html[first:end if end >= 0 else len(library_html)]
+
+def _find_search_state(library_html: str) -> dict:
+    """Locate the embedded application state that holds the search results.
+    
+    BiblioCommons renders its server-side state into
+    <script type="application/json"> blocks; the one with bib entities
+    and a catalogSearch section is the search result state.
+    
+    Args:
+        library_html (str): Raw HTML of a search results page.
+    
+    Returns:
+        dict: Decoded state, or None if the page does not embed one.
+    """
+    for match in _STATE_SCRIPT.finditer(library_html):
+        blob = match.group(1)
+        if '"catalogSearch"' not in blob:
+            continue
+        try:
+            state = json.loads(blob)
+        except ValueError:
+            continue
+        if isinstance(state, dict) and 'entities' in state and 'search' in state:
+            return state
+
+    return None
+
+def _book_from_state(bib: dict, fields: tuple = None) -> Book:
+    """Build a Book from one bib entity of the embedded state.
+    
+    Field values are shaped to match what the result cards display, so
+    both extraction paths store identical rows.
+    
+    Args:
+        bib (dict): Bib entity with briefInfo and optional rating sections.
+        fields (tuple, optional): Normalized projection, None for all fields.
+    
+    Returns:
+        Book: Book populated with whatever fields the entity provides.
+    """
+    fields = fields or BOOK_FIELDS
+    info = bib.get('briefInfo') or {}
+    book = Book()
+    if 'title' in fields:
+        book.title = info.get('title')
+        if book.title is not None and info.get('subtitle'):
+            book.title += f": {info['subtitle']}"
+    try:
+        if 'author' in fields:
+            book.author = canonical_author(info['authors'][0])
+    except:
+        pass
+    if 'format' in fields:
+        book.format = STATE_FORMAT_LABELS.get(info.get('format'), info.get('format'))
+    try:
+        if 'pub_year' in fields:
+            book.pub_year = int(_YEAR.search(str(info['publicationDate'])).group())
+            if book.pub_year < 1000:
+                book.pub_year = None
+    except:
+        pass
+    try:
+        if 'rating' in fields or 'num_ratings' in fields:
+            rating = bib['rating']
+            average = float(rating['averageRating'])
+            if 'rating' in fields:
+                book.rating = average
+            if 'num_ratings' in fields:
+                book.num_ratings = int(rating['totalCount'])
+    except:
+        pass
+    if 'link' in fields and bib.get('id'):
+        book.link = f"/v2/record/{bib['id']}"
+
+    return book
+
+def parse_search_state(library_html: str, fields: tuple = None) -> tuple:
+    """Extract the result count and books from the page's embedded JSON state.
+    
+    Args:
+        library_html (str): Raw HTML of a search results page.
+        fields (tuple, optional): Normalized projection, None for all fields.
+    
+    Returns:
+        tuple: (target_item_count, books) in page order, or None if the page
+            has no usable embedded state.
+    """
+    state = _find_search_state(library_html)
+    if state is None:
+        return None
+
+    try:
+        catalog_search = state['search']['catalogSearch']
+        bibs = state['entities']['bibs']
+        target_item_count = int(catalog_search['pagination']['count'])
+        books = [_book_from_state(bibs[result['representative']], fields)
+                 for result in catalog_search['results']]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    return target_item_count, books
+
+def page_fingerprint(library_html: str, fields: tuple = None) -> str:
+    """Hash the parts of a page that the extractors read.
+    
+    Uses the embedded search state when present and otherwise the result
+    count and card markup, so tokens, timestamps and other page chrome
+    that change on every request do not defeat the parse cache. A field
+    projection and PARSER_VERSION are mixed in, since both change what a
+    parse returns.
+    
+    Args:
+        library_html (str): Raw HTML of a search results page.
+        fields (tuple, optional): Normalized projection, None for all fields.
+        
+    Returns:
+        str: Hex digest identifying the page's result content.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"parser={PARSER_VERSION};".encode())
+    state = next((match.group(1) for match in _STATE_SCRIPT.finditer(library_html)
+                  if '"catalogSearch"' in match.group(1)), None)
+    if state is not None:
+        digest.update(state.encode())
+    else:
+        target_item_count, card_markup = _slice_results(library_html)
+        digest.update(str(target_item_count).encode())
+        digest.update((card_markup or library_html).encode())
+    if fields is not None:
+        digest.update(f"fields={','.join(fields)}".encode())
+
+    return digest.hexdigest()
+
+def parse_search_page(library_html: str, partial: bool = True, use_state: bool = True,
+                      fields=None) -> tuple:
+    """Parse a search page for its result count and cards.
+    
+    Decodes the embedded JSON state when the page has one and otherwise
+    falls back to walking the result cards with lxml.
+    
+    Args:
+        library_html (str): Raw HTML of a search results page.
+        partial (bool): Build the tree only for the result cards instead
+            of the whole page. Default True.
+        use_state (bool): Try the embedded JSON state first. Default True.
+        fields (iterable, optional): Book attributes to extract; the rest
+            are left as None. Default None extracts every field.
+    
+    Returns:
+        tuple: (target_item_count, books) where books is a list of Book
+            instances in page order.
+    
+    Raises:
+        ValueError: If fields names an unknown attribute.
+    """
+    fields = normalize_fields(fields)
+    if not library_html or not library_html.strip():
+        return 0, []
+
+    if use_state:
+        parsed = parse_search_state(library_html, fields)
+        if parsed is not None:
+            return parsed
+
+    if partial:
+        target_item_count, card_markup = _slice_results(library_html)
+        if card_markup is None:
+            return target_item_count, []
+        root = html.document_fromstring(card_markup)
+    else:
+        root = html.document_fromstring(library_html)
+        labels = _PAGINATION_XPATH(root)
+        target_item_count = _parse_count_text(labels[0].text_content()) if labels else 0
+
+    return target_item_count, [_extract_card(card, fields) for card in _CARDS_XPATH(root)]
+
+def parse_search_pages(pages: list, fields=None) -> list:
+    """Parse several pages into plain field tuples.
+    
+    Entry point for parse worker processes: Book objects are flattened
+    into tuples so results are cheap to send back to the parent.
+    
+    Args:
+        pages (list): Raw HTML strings; None entries count as empty pages.
+        fields (iterable, optional): Book attributes to extract. Default None
+            extracts every field.
+    
+    Returns:
+        list: (target_item_count, records) per page, where each record is
+            (title, author, format, pub_year, rating, num_ratings, link).
+    """
+    results = []
+    for library_html in pages:
+        target_item_count, books = parse_search_page(library_html, fields=fields)
+        results.append((target_item_count, [
+            (book.title, book.author, book.format, book.pub_year,
+             book.rating, book.num_ratings, book.link) for book in books]))
+
+    return results
+
+def _detail_value(field: str, value):
+    """Shape one raw detail value into the stored form of its field.
+    
+    Args:
+        field (str): Name from DETAIL_FIELDS.
+        value: String or list of strings read from the page.
+    
+    Returns:
+        The stored value: a list of strings for subjects, an int for
+            page_count and a string otherwise, or None if unreadable.
+    """
+    values = value if isinstance(value, list) else [value]
+    values = [str(item.get('name') or item.get('value') or '') if isinstance(item, dict) else str(item)
+              for item in values]
+    values = [item.strip() for item in values if item and item.strip()]
+    if not values:
+        return None
+    if field == 'subjects':
+        return values
+    if field == 'isbn':
+        match = _ISBN.search(values[0].replace('-', ''))
+        return match.group() if match else None
+    if field == 'page_count':
+        match = _PAGE_COUNT.search(' '.join(values))
+        return int(match.group(1)) if match else None
+    return values[0]
+
+def _find_detail_state(library_html: str, link: str = None) -> dict:
+    """Locate the bib entity of an item detail page's embedded state.
+    
+    Args:
+        library_html (str): Raw HTML of an item detail page.
+        link (str, optional): Item link, used to pick the page's own bib
+            when the state holds several.
+    
+    Returns:
+        dict: The bib's fields with its briefInfo merged in, or None.
+    """
+    match = _RECORD_ID.search(link or '')
+    for state_match in _STATE_SCRIPT.finditer(library_html):
+        blob = state_match.group(1)
+        if '"bibs"' not in blob:
+            continue
+        try:
+            bibs = json.loads(blob)['entities']['bibs']
+        except (ValueError, KeyError, TypeError):
+            continue
+        if match and match.group(1) in bibs:
+            bib = bibs[match.group(1)]
+        elif len(bibs) == 1:
+            bib = next(iter(bibs.values()))
+        else:
+            continue
+        return {**bib, **(bib.get('briefInfo') or {})}
+
+    return None
+
+def parse_item_details(library_html: str, link: str = None) -> dict:
+    """Extract the fields of an item detail page that search cards lack.
+    
+    Reads the bib entity of the embedded JSON state when the page has
+    one and fills anything still missing from the page's labelled
+    <dt>/<dd> detail pairs.
+    
+    Args:
+        library_html (str): Raw HTML of an item detail page.
+        link (str, optional): Item link the page was fetched from.
+    
+    Returns:
+        dict: DETAIL_FIELDS -> value, with None for fields the page lacks.
+    """
+    details = dict.fromkeys(DETAIL_FIELDS)
+    if not library_html:
+        return details
+
+    info = _find_detail_state(library_html, link)
+    if info is not None:
+        for field, keys in _DETAIL_STATE_KEYS.items():
+            value = next((info[key] for key in keys if info.get(key)), None)
+            if value is not None:
+                details[field] = _detail_value(field, value)
+
+    if None in details.values() and '<dt' in library_html:
+        root = html.document_fromstring(library_html)
+        for term in root.iter('dt'):
+            field = _DETAIL_LABELS.get(term.text_content().strip().rstrip(':').lower())
+            definition = term.getnext()
+            if field is None or details[field] is not None or definition is None or definition.tag != 'dd':
+                continue
+            values = [item.text_content() for item in definition.iter('li')]
+            details[field] = _detail_value(field, values or definition.text_content())
+
+    return details
+
+def _extract_card_soup(book_card) -> Book:
+    """Extract one result card with BeautifulSoup find() chains.
+    
+    Args:
+        book_card (bs4.element.Tag): Result card element.
+    
+    Returns:
+        Book: Book populated with whatever fields the card provides.
+    """
+    book = Book()
+    book.title = book_card.find('span', class_='title-content').text
+    try:
+        subtitle = book_card.find('span', class_='cp-subtitle').text
+        book.title += f": {subtitle}"
+    except:
+        pass
+    try:
+        book.author = canonical_author(book_card.find('a', class_='author-link').text)
+    except:
+        pass
+    try:
+        book.format = book_card.find('span', class_='display-info-primary').text.split(', ')[0]
+    except:
+        pass
+    try:
+        book.pub_year = int(book_card.find('span', class_='display-info-primary').text.split(', ')[1])
+        if book.pub_year < 1000:
+            book.pub_year = None
+    except:
+        pass
+    try:
+        book.rating = float(book_card.find('span', class_='cp-rating-stars rating-stars').span.text.split(' ')[2])
+        book.num_ratings = int(book_card.find('span', class_='rating-count').text.strip('(,)').split(' ')[0].replace(',',''))
+    except:
+        pass
+    try:
+        book.link = book_card.find('h2', class_='cp-title').a['href']
+    except:
+        pass
+
+    return book
+
+def parse_search_page_soup(library_html: str) -> tuple:
+    """Parse a search page with BeautifulSoup find() chains.
+    
+    Reference implementation kept for benchmarks and for checking the
+    lxml extractor against it.
+    
+    Args:
+        library_html (str): Raw HTML of a search results page.
+    
+    Returns:
+        tuple: (target_item_count, books) where books is a list of Book
+            instances in page order.
+    """
+    soup = BeautifulSoup(library_html, 'lxml')
+    try:
+        target_item_count = _parse_count_text(soup.find('span', class_=PAGINATION_CLASS).text)
+    except:
+        target_item_count = 0
+
+    books = [_extract_card_soup(book_card) for book_card in soup.find_all('div', class_=RESULT_CARD_CLASS)]
+
+    return target_item_count, books
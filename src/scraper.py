@@ -1,7 +1,9 @@
 """scraper.py - Web scraping module for Calgary Public Library catalog.
 
 Handles automated data extraction from the Calgary Public Library's online
-catalog using Selenium WebDriver and BeautifulSoup for HTML parsing.
+catalog. Search result pages are fetched over plain HTTP with Requests and
+parsed by the parser module; Selenium WebDriver is only used when explicitly
+requested or as an opt-in fallback for pages that fail to render server-side.
 Extracts book metadata including titles, authors, ratings, and publication details.
 """
 
@@ -9,26 +11,137 @@ __author__ = "Abiola Raji"
 __version__ = "1.0"
 __date__ = "2025-09-03"
 
-from bs4 import BeautifulSoup
 from selenium import webdriver
-from .library_db import LibraryDB, Book
-from urllib.parse import urlencode
+from .library_db import LibraryDB, Book, ParseCache, ResponseCache
+from .archive import PageArchive
+from .parser import parse_search_page, parse_search_pages, page_fingerprint, normalize_fields, parse_item_details, RESULT_CARD_CLASS
+from urllib.parse import urlencode, urljoin
 from selenium.webdriver.chrome.options import Options
-import re
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import SessionNotCreatedException, TimeoutException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import math
+import os
+import queue
+import random
 import requests
 import sys
+import threading
+import time
 
-def _get_driver(headless=True):
+BASE_URL = "https://calgary.bibliocommons.com/v2/search"
+FORMAT_FILTER = 'BK|EBOOK|GRAPHIC_NOVEL|LPRINT|BOARD_BK|PAPERBACK'
+RESULTS_PER_PAGE = 20
+MAX_SCRAPE_PASSES = 3
+PARTITION_FACETS = ('format', 'year')
+MAX_PARTITION_ITEMS = 2000
+FIRST_PUB_YEAR = 1500
+YEAR_FILTER_PARAMS = ('f_PUBLISHED_YEAR_FROM', 'f_PUBLISHED_YEAR_TO')
+PARTITION_QUEUE_SIZE = 8
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 10.0
+LATENCY_TARGET = 3.0
+MAX_REQUEST_GAP = 5.0
+THROTTLE_STATUS_CODES = (429, 503)
+MAX_DRIVERS = os.cpu_count() or 1
+DETAIL_CONCURRENCY = 8
+DETAIL_MAX_AGE = 30 * 24 * 60 * 60
+DETAIL_BATCH_SIZE = 50
+RENDER_TIMEOUT = 15
+BLOCKED_URL_PATTERNS = [
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.webp', '*.ico',
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*',
+    '*facebook.net*', '*hotjar.com*', '*newrelic.com*', '*nr-data.net*',
+    '*syndetics.com*', '*contentcafe2.btol.com*',
+]
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+HTTP_POOL_SIZE = 16
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+_session = None
+_session_timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+_session_lock = threading.RLock()
+
+def configure_session(pool_size: int = HTTP_POOL_SIZE, connect_timeout: float = CONNECT_TIMEOUT,
+                      read_timeout: float = READ_TIMEOUT):
+    """Create the HTTP session shared by every request in this module.
+    
+    The session keeps connections alive in a pool sized for concurrent
+    page downloads, negotiates gzip/deflate compression and retries
+    failed connection attempts. Calling it again replaces the shared
+    session, e.g. to raise the pool size before a highly concurrent run.
+    
+    Args:
+        pool_size (int): Maximum pooled connections per host. Default HTTP_POOL_SIZE.
+        connect_timeout (float): Seconds to wait for a connection. Default CONNECT_TIMEOUT.
+        read_timeout (float): Seconds to wait for response data. Default READ_TIMEOUT.
+        
+    Returns:
+        requests.Session: The new shared session.
+    """
+    global _session, _session_timeout
+
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(connect=2, read=0, status=0, backoff_factor=0.2),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    with _session_lock:
+        previous, _session = _session, session
+        _session_timeout = (connect_timeout, read_timeout)
+    if previous is not None:
+        previous.close()
+
+    return session
+
+def _get_session():
+    """Return the shared HTTP session, creating it on first use.
+    
+    Returns:
+        requests.Session: Session used for all catalog requests.
+    """
+    with _session_lock:
+        if _session is None:
+            return configure_session()
+        return _session
+
+def _get_driver(headless=True, lean=True):
     """Initialize and configure Chrome WebDriver instance.
     
+    In lean mode images, stylesheets, fonts and known third-party scripts
+    are blocked and page loads return as soon as the DOM is ready, since
+    only the result cards are read from the rendered page.
+    
     Args:
         headless (bool): Run browser in headless mode. Default True.
+        lean (bool): Block non-essential resources and use an eager
+            page load strategy. Default True.
         
     Returns:
         webdriver.Chrome: Configured Chrome WebDriver instance.
         
     Raises:
-        SystemExit: If driver initialization fails.
+        SessionNotCreatedException: If driver initialization fails.
     """
     try:
         options = Options()
@@ -37,145 +150,1553 @@ def _get_driver(headless=True):
         options.add_argument("--disable-gpu")
         options.add_argument("--no-sandbox")
         options.add_argument("--window-size=1920,1080")
+        if lean:
+            options.page_load_strategy = 'eager'
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.fonts": 2,
+            })
 
         driver = webdriver.Chrome(options=options)
+        if lean:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
         return driver
     
-    except:
+    except Exception as e:
         print("Unable to get driver")
-        sys.exit(1)
+        raise SessionNotCreatedException(f"Unable to get driver: {e}") from e
 
-def _get_target_item_count(url: str, query: str) -> int:
-    """Determine total number of search results available.
+class _DriverPool:
+    """Bounded pool of Chrome WebDriver instances.
+    
+    Drivers are started lazily through _get_driver, up to the pool size,
+    and handed out to worker threads one at a time.
+    """
+
+    def __init__(self, size: int, headless: bool = True, lean: bool = True):
+        """Initialize an empty driver pool.
+        
+        Args:
+            size (int): Maximum number of drivers, capped at MAX_DRIVERS.
+            headless (bool): Run browsers in headless mode. Default True.
+            lean (bool): Start drivers with the lean profile. Default True.
+        """
+        self.size = max(1, min(size, MAX_DRIVERS))
+        self.headless = headless
+        self.lean = lean
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Borrow a driver, starting a new one if the pool is not full.
+        
+        Returns:
+            webdriver.Chrome: Driver reserved for the caller.
+        """
+        with self._lock:
+            start_new = self._idle.empty() and self._started < self.size
+            if start_new:
+                self._started += 1
+
+        if not start_new:
+            return self._idle.get()
+
+        try:
+            driver = _get_driver(headless=self.headless, lean=self.lean)
+        except BaseException:
+            with self._lock:
+                self._started -= 1
+            raise
+
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def release(self, driver) -> None:
+        """Return a borrowed driver to the pool.
+        
+        Args:
+            driver (webdriver.Chrome): Driver previously returned by acquire.
+        """
+        self._idle.put(driver)
+
+    def render(self, url: str, page_number: int) -> str:
+        """Render a page on a borrowed driver and log how long it took.
+        
+        Args:
+            url (str): Page URL to render.
+            page_number (int): Results page number, used in the timing log.
+            
+        Returns:
+            str: Page source after rendering.
+        """
+        driver = self.acquire()
+        try:
+            start = time.perf_counter()
+            library_html = _fetch_html_with_driver(driver, url)
+            print(f"Rendered page {page_number} in {time.perf_counter() - start:.2f}s")
+            return library_html
+        finally:
+            self.release(driver)
+
+    def close(self) -> None:
+        """Quit every driver started by the pool."""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            driver.quit()
+
+class RetryPolicy:
+    """Retry settings for page fetches.
+    
+    Failed fetches are retried with exponential backoff and full jitter:
+    before retry n the caller sleeps a random time between zero and
+    min(max_delay, base_delay * 2**n). Client errors other than 429
+    are not retried.
+    """
+
+    def __init__(self, attempts: int = RETRY_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY):
+        """Initialize a retry policy.
+        
+        Args:
+            attempts (int): Total tries per page, including the first. Default RETRY_ATTEMPTS.
+            base_delay (float): Backoff before the first retry, in seconds. Default RETRY_BASE_DELAY.
+            max_delay (float): Upper bound on any single backoff. Default RETRY_MAX_DELAY.
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Pick a jittered delay before the next try.
+        
+        Args:
+            attempt (int): Zero-based number of the attempt that just failed.
+            
+        Returns:
+            float: Seconds to sleep.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func, *args):
+        """Call func, retrying transient failures.
+        
+        Args:
+            func (callable): Function to call.
+            *args: Positional arguments for func.
+            
+        Returns:
+            Whatever func returns.
+            
+        Raises:
+            Exception: The last error once all attempts are used up, or
+                immediately for errors that are not worth retrying.
+        """
+        for attempt in range(self.attempts):
+            try:
+                return func(*args)
+            except Exception as e:
+                if attempt == self.attempts - 1 or not _is_retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                print(f"Request failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+def _is_retryable(error: Exception) -> bool:
+    """Decide whether a failed fetch is worth retrying.
     
-    Makes initial request to catalog search page to extract the total
-    number of items matching the search query.
+    Args:
+        error (Exception): Error raised by the fetch.
+        
+    Returns:
+        bool: False for HTTP client errors other than 429 and for Chrome
+            failing to start, True otherwise.
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+
+    return not isinstance(error, SessionNotCreatedException)
+
+class RateController:
+    """Adaptive limit on concurrent catalog requests.
+    
+    Uses additive-increase / multiplicative-decrease: every successful
+    response under the latency target raises the concurrency limit by
+    roughly one per round trip and shrinks the gap between request
+    starts, while a throttling response, error or slow response halves
+    the limit and widens the gap. Decreases happen at most once per
+    round trip so a burst of failures from one window only counts once.
+    """
+
+    def __init__(self, max_concurrency: int = 1, min_concurrency: int = 1,
+                 latency_target: float = LATENCY_TARGET, max_gap: float = MAX_REQUEST_GAP):
+        """Initialize a controller starting at half the concurrency ceiling.
+        
+        Args:
+            max_concurrency (int): Upper bound on requests in flight. Default 1.
+            min_concurrency (int): Lower bound on requests in flight. Default 1.
+            latency_target (float): Response time in seconds above which the
+                limit is reduced. Default LATENCY_TARGET.
+            max_gap (float): Largest delay between request starts. Default MAX_REQUEST_GAP.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.latency_target = latency_target
+        self.max_gap = max_gap
+        self.limit = float(max(self.min_concurrency, math.ceil(self.max_concurrency / 2)))
+        self.gap = 0.0
+        self._in_flight = 0
+        self._next_start = 0.0
+        self._latency = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a request may start under the current limit and gap."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+            start = max(time.monotonic(), self._next_start)
+            self._next_start = start + self.gap
+
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self, latency: float, throttled: bool = False) -> None:
+        """Record the outcome of a request and adjust the limit.
+        
+        Args:
+            latency (float): Seconds the request took.
+            throttled (bool): The request failed or was throttled. Default False.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            now = time.monotonic()
+
+            if throttled or latency > self.latency_target:
+                if now - self._last_decrease > self._latency:
+                    self._last_decrease = now
+                    self.limit = max(float(self.min_concurrency), self.limit / 2)
+                    if throttled:
+                        self.gap = min(self.max_gap, max(self.gap * 2, 0.25))
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                self.gap = self.gap / 2 if self.gap > 0.01 else 0.0
+
+            self._condition.notify_all()
+
+    def call(self, func, *args):
+        """Run one request under the controller.
+        
+        Args:
+            func (callable): Function performing the request.
+            *args: Positional arguments for func.
+            
+        Returns:
+            Whatever func returns.
+        """
+        self.acquire()
+        start = time.monotonic()
+        throttled = False
+        try:
+            return func(*args)
+        except Exception as e:
+            throttled = _is_throttled(e)
+            raise
+        finally:
+            self.release(time.monotonic() - start, throttled=throttled)
+
+    def status(self) -> str:
+        """Describe the controller's current decisions.
+        
+        Returns:
+            str: Current concurrency limit and request gap.
+        """
+        return f"limit {int(self.limit)}/{self.max_concurrency}, gap {self.gap:.2f}s"
+
+def _is_throttled(error: Exception) -> bool:
+    """Decide whether a failed request should slow the crawl down.
+    
+    Args:
+        error (Exception): Error raised by the request.
+        
+    Returns:
+        bool: True for throttling responses, server errors and timeouts.
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status in THROTTLE_STATUS_CODES or status >= 500
+
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+class _StageTimer:
+    """Accumulates wall-clock time spent in each stage of a scrape.
+    
+    Used to report whether fetching, parsing or the consumer of the
+    results is the bottleneck once all pages have been processed.
+    """
+
+    def __init__(self):
+        """Initialize a timer with no recorded stages."""
+        self.totals = {}
+        self.pages = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block and add it to the named stage.
+        
+        Args:
+            name (str): Stage label, e.g. "fetch", "parse" or "consume".
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self) -> str:
+        """Summarize total and per-page time for every stage.
+        
+        Returns:
+            str: Human-readable timing summary naming the slowest stage.
+        """
+        if not self.totals:
+            return "No stage timings recorded"
+
+        pages = max(self.pages, 1)
+        lines = [f"Stage timings over {self.pages} pages:"]
+        for name, total in self.totals.items():
+            lines.append(f"  {name:<7} {total:8.2f}s total, {total / pages * 1000:8.1f}ms/page")
+        bottleneck = max(self.totals, key=self.totals.get)
+        lines.append(f"  Bottleneck: {bottleneck}")
+
+        return "\n".join(lines)
+
+def _build_search_url(url: str, query: str, page_number: int = None, filters: dict = None) -> str:
+    """Build the catalog search URL for a query and optional page.
     
     Args:
         url (str): Base URL for library catalog search.
         query (str): Search term to look up.
+        page_number (int, optional): Results page to request.
+        filters (dict, optional): Search parameters added to, or replacing,
+            the default ones, e.g. {'f_FORMAT': 'EBOOK'}.
         
     Returns:
-        int: Total number of items found for the search query.
-        
-    Raises:
-        SystemExit: If unable to retrieve or parse result count.
+        str: Fully encoded search URL.
     """
     params = {
             'query': query,
             'searchType': 'tag',
             'locked': 'true',
-            'f_FORMAT': 'BK|EBOOK|GRAPHIC_NOVEL|LPRINT|BOARD_BK|PAPERBACK',
+            'f_FORMAT': FORMAT_FILTER,
         }
+    if filters:
+        params.update(filters)
+    if page_number is not None:
+        params['page'] = page_number
+
+    return f"{url}?{urlencode(params)}"
+
+def _fetch_html(url: str) -> str:
+    """Download a catalog page over the shared HTTP session.
     
+    Args:
+        url (str): Page URL to request.
+        
+    Returns:
+        str: Raw HTML of the page.
+        
+    Raises:
+        requests.RequestException: If the request fails or returns an error status.
+    """
+    response = _get_session().get(url, timeout=_session_timeout)
+    response.raise_for_status()
+    return response.text
+
+def _fetch_html_with_driver(driver, url: str, timeout: float = RENDER_TIMEOUT) -> str:
+    """Render a catalog page in Chrome and return the resulting HTML.
+    
+    Waits only until the result cards are present rather than for the
+    full page load. Pages without results are returned once the timeout
+    expires.
+    
+    Args:
+        driver (webdriver.Chrome): Active WebDriver instance.
+        url (str): Page URL to render.
+        timeout (float): Seconds to wait for result cards. Default RENDER_TIMEOUT.
+        
+    Returns:
+        str: Page source after rendering.
+    """
+    driver.get(url)
     try:
-        url = f"{url}?{urlencode(params)}"
-        raw_html = requests.get(url).text
-        soup = BeautifulSoup(raw_html, 'lxml')
-        try:
-            target_item_count = int(soup.find('span', class_='cp-pagination-label').text.split()[4].replace(',',''))
-        except:
-            target_item_count = 0
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CLASS_NAME, RESULT_CARD_CLASS)))
+    except TimeoutException:
+        pass
+
+    return driver.page_source
 
+def _get_target_item_count(url: str, query: str, filters: dict = None) -> int:
+    """Determine total number of search results available.
+    
+    Makes a standalone request for the first search page to extract the
+    total number of items matching the search query. scrape_library_data
+    reads the count from the first page it fetches instead.
+    
+    Args:
+        url (str): Base URL for library catalog search.
+        query (str): Search term to look up.
+        filters (dict, optional): Extra search parameters, see _build_search_url.
+        
+    Returns:
+        int: Total number of items found for the search query.
+        
+    Raises:
+        SystemExit: If unable to retrieve or parse result count.
+    """
+    try:
+        raw_html = _fetch_html(_build_search_url(url, query, filters=filters))
+        target_item_count, _ = parse_search_page(raw_html)
         return target_item_count
     
     except:
         print("Could not scrape target amount")
         sys.exit(1)
 
-def scrape_library_data(library_db: LibraryDB, query: str) -> None:
+def _get_page_count(target_item_count: int, page_size: int = RESULTS_PER_PAGE) -> int:
+    """Calculate how many result pages hold the given number of items.
+    
+    Args:
+        target_item_count (int): Total number of items for the query.
+        page_size (int): Items shown per results page. Default RESULTS_PER_PAGE.
+        
+    Returns:
+        int: Number of result pages to fetch.
+    """
+    return math.ceil(target_item_count / page_size)
+
+def _iter_pages_prefetch(query: str, page_numbers, fetch, filters: dict = None) -> tuple:
+    """Fetch result pages in order, downloading one page ahead.
+    
+    The download of page N+1 is started before page N is handed to the
+    caller, so the network request overlaps with parsing and storing.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        page_numbers (iterable): Page numbers to fetch, in order.
+        fetch (callable): fetch(url, page_number) returning the page HTML,
+            or None if the page could not be fetched.
+        filters (dict, optional): Extra search parameters, see _build_search_url.
+        
+    Yields:
+        tuple: (page_number, url, html) for each page.
+    """
+    page_numbers = iter(page_numbers)
+
+    def fetch_page(page_number):
+        url = _build_search_url(BASE_URL, query, page_number, filters)
+        return page_number, url, fetch(url, page_number)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page_number = next(page_numbers, None)
+        pending = executor.submit(fetch_page, page_number) if page_number is not None else None
+        while pending is not None:
+            page = pending.result()
+            page_number = next(page_numbers, None)
+            pending = executor.submit(fetch_page, page_number) if page_number is not None else None
+            yield page
+
+async def _fetch_pages_async(query: str, page_numbers, fetch, concurrency: int,
+                             filters: dict = None):
+    """Download result pages concurrently, yielding them in page order.
+    
+    At most `concurrency` requests run at once and at most twice that many
+    pages are scheduled ahead of the one being consumed, so memory stays
+    bounded no matter how many pages the query has.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        page_numbers (iterable): Page numbers to fetch, in order.
+        fetch (callable): fetch(url, page_number) returning the page HTML,
+            or None if the page could not be fetched.
+        concurrency (int): Maximum number of requests in flight.
+        filters (dict, optional): Extra search parameters, see _build_search_url.
+        
+    Yields:
+        tuple: (page_number, url, html) for each page.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(url, page_number):
+        async with semaphore:
+            return await asyncio.to_thread(fetch, url, page_number)
+
+    window = deque()
+    try:
+        for page_number in page_numbers:
+            url = _build_search_url(BASE_URL, query, page_number, filters)
+            window.append((page_number, url, asyncio.ensure_future(fetch_page(url, page_number))))
+            if len(window) >= concurrency * 2:
+                page_number, url, task = window.popleft()
+                yield page_number, url, await task
+
+        while window:
+            page_number, url, task = window.popleft()
+            yield page_number, url, await task
+
+    finally:
+        for _, _, task in window:
+            task.cancel()
+
+def _iter_pages_async(query: str, page_numbers, fetch, concurrency: int,
+                      filters: dict = None) -> tuple:
+    """Drive _fetch_pages_async from synchronous code.
+    
+    Runs a private event loop whose default executor is sized to the
+    requested concurrency, since each download runs in a worker thread.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        page_numbers (iterable): Page numbers to fetch, in order.
+        fetch (callable): fetch(url, page_number) returning the page HTML,
+            or None if the page could not be fetched.
+        concurrency (int): Maximum number of requests in flight.
+        filters (dict, optional): Extra search parameters, see _build_search_url.
+        
+    Yields:
+        tuple: (page_number, url, html) for each page, in page order.
+    """
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    pages = _fetch_pages_async(query, page_numbers, fetch, concurrency, filters)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(pages.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(pages.aclose())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+def _iter_pages_driver_pool(query: str, page_numbers, fetch, pool: _DriverPool,
+                            filters: dict = None) -> tuple:
+    """Render result pages in parallel across a pool of Chrome instances.
+    
+    One worker thread per pool slot claims page numbers from a shared
+    queue and renders them on a driver borrowed from the pool. Workers
+    stay at most two pages per driver ahead of the consumer, and pages
+    are yielded back in page order. A worker whose Chrome fails to start
+    hands its page to the workers still running; once none are left,
+    pages nobody rendered are yielded without HTML.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        page_numbers (iterable): Page numbers to render, in order.
+        fetch (callable): fetch(url, page_number) rendering the page through
+            the pool, returning None if the page could not be rendered.
+        pool (_DriverPool): Pool providing the Chrome instances.
+        filters (dict, optional): Extra search parameters, see _build_search_url.
+        
+    Yields:
+        tuple: (page_number, url, html) for each page, in page order; html
+            is None for pages left over when every worker has stopped.
+        
+    Raises:
+        RuntimeError: If none of the drivers could be started.
+    """
+    page_numbers = list(page_numbers)
+    # Lowest page first, so a page handed back is claimed before later ones
+    page_queue = queue.PriorityQueue()
+    for page_number in page_numbers:
+        page_queue.put(page_number)
+
+    results = {}
+    failed_workers = []
+    running = [pool.size]
+    ready = threading.Condition()
+    ahead = threading.Semaphore(pool.size * 2)
+    stop = threading.Event()
+
+    def work():
+        while True:
+            ahead.acquire()
+            if stop.is_set():
+                return
+            try:
+                page_number = page_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            url = _build_search_url(BASE_URL, query, page_number, filters)
+            try:
+                result = (url, fetch(url, page_number), None)
+            except SessionNotCreatedException as e:
+                # This worker's Chrome cannot start; hand the page to a worker
+                # that is still running, if there is one
+                with ready:
+                    failed_workers.append(e)
+                    if running[0] > 1:
+                        page_queue.put(page_number)
+                ahead.release()
+                return
+            except Exception as e:
+                result = (url, None, e)
+
+            with ready:
+                results[page_number] = result
+                ready.notify_all()
+
+    def worker():
+        try:
+            work()
+        finally:
+            with ready:
+                running[0] -= 1
+                ready.notify_all()
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(pool.size)]
+    for thread in workers:
+        thread.start()
+
+    try:
+        rendered = False
+        for page_number in page_numbers:
+            with ready:
+                ready.wait_for(lambda: page_number in results or running[0] == 0)
+                if page_number in results:
+                    url, library_html, error = results.pop(page_number)
+                elif rendered or len(failed_workers) < pool.size:
+                    url, library_html, error = (
+                        _build_search_url(BASE_URL, query, page_number, filters), None, None)
+                else:
+                    raise RuntimeError(f"Unable to start any of {pool.size} Chrome drivers")
+                rendered = rendered or library_html is not None
+
+            ahead.release()
+            if error is not None:
+                raise error
+            yield page_number, url, library_html
+
+    finally:
+        stop.set()
+        for _ in workers:
+            ahead.release()
+        for thread in workers:
+            thread.join()
+
+def _iter_parsed_pages(pages, timer: _StageTimer, executor: ProcessPoolExecutor = None,
+                       workers: int = 0, chunksize: int = 1, cache: ParseCache = None,
+                       fields: tuple = None) -> tuple:
+    """Parse fetched pages, optionally in a pool of worker processes.
+    
+    Without an executor pages are parsed in this process as they arrive.
+    With one, pages are grouped into chunks of raw HTML and sent to
+    parse_search_pages in the workers, which return plain field tuples.
+    Up to two chunks per worker are kept in flight so fetching continues
+    while earlier pages are parsed, and results come back in page order.
+    When a cache is given, pages whose result markup was parsed before
+    are served from it and never reach a parser.
+    
+    Args:
+        pages (iterator): (page_number, url, html) tuples from a page iterator.
+        timer (_StageTimer): Timer charged with fetch and parse waits.
+        executor (ProcessPoolExecutor, optional): Pool to parse in.
+        workers (int): Number of worker processes in the pool. Default 0.
+        chunksize (int): Pages per worker task. Default 1.
+        cache (ParseCache, optional): Cache of previously parsed pages.
+        fields (tuple, optional): Normalized field projection, None for all fields.
+        
+    Yields:
+        tuple: (page_number, url, html, (target_item_count, books)) for each page.
+    """
+    def next_page():
+        with timer.stage("fetch"):
+            page = next(pages, None)
+        if page is None or cache is None or page[2] is None:
+            return page, None, None
+
+        with timer.stage("cache"):
+            page_hash = page_fingerprint(page[2], fields)
+            return page, page_hash, cache.get(page_hash)
+
+    def remember(page_hash, parsed):
+        if page_hash is not None and parsed[1]:
+            with timer.stage("cache"):
+                cache.put(page_hash, *parsed)
+
+    def as_books(page, parsed):
+        page_number, url, library_html = page
+        target_item_count, records = parsed
+        return page_number, url, library_html, (target_item_count, [Book(*record) for record in records])
+
+    if executor is None:
+        while True:
+            page, page_hash, parsed = next_page()
+            if page is None:
+                return
+            if parsed is None:
+                with timer.stage("parse"):
+                    parsed = parse_search_pages([page[2]], fields)[0]
+                remember(page_hash, parsed)
+            yield as_books(page, parsed)
+
+    def submit_chunk():
+        chunk = []
+        while len(chunk) < chunksize:
+            entry = next_page()
+            if entry[0] is None:
+                break
+            chunk.append(entry)
+        misses = [page[2] for page, _, parsed in chunk if parsed is None]
+        if chunk:
+            window.append((chunk, executor.submit(parse_search_pages, misses, fields) if misses else None))
+        return len(chunk) == chunksize
+
+    window = deque()
+    more = True
+    while more and len(window) < max(workers, 1) * 2:
+        more = submit_chunk()
+
+    while window:
+        chunk, future = window.popleft()
+        with timer.stage("parse"):
+            results = iter(future.result() if future is not None else [])
+        if more:
+            more = submit_chunk()
+        for page, page_hash, parsed in chunk:
+            if parsed is None:
+                parsed = next(results)
+                remember(page_hash, parsed)
+            yield as_books(page, parsed)
+
+def is_scrape_incomplete(library_db: LibraryDB, query: str, partition_by: str = None) -> bool:
+    """Check whether a previous scrape of a query stopped part way.
+    
+    Args:
+        library_db (LibraryDB): Database holding the scrape checkpoints.
+        query (str): Search term to check.
+        partition_by (str, optional): Facet the scrape was partitioned by.
+        
+    Returns:
+        bool: True if some but not all result pages of the query were
+            stored, or, when partitioned, if any planned partition of it
+            is not done yet.
+    """
+    if partition_by is not None:
+        return any(not done for _, _, done in library_db.get_scrape_partitions(query, partition_by))
+
+    target_item_count, completed_pages = library_db.get_scrape_progress(query)
+    return bool(completed_pages) and len(completed_pages) < _get_page_count(target_item_count)
+
+def has_scrape_progress(library_db: LibraryDB, query: str, partition_by: str = None) -> bool:
+    """Check whether anything of a query has been scraped yet.
+    
+    Unlike is_scrape_incomplete, this is also true for a query that
+    finished, or that only stored its first page, so a batch can tell
+    whether it was started before.
+    
+    Args:
+        library_db (LibraryDB): Database holding the scrape checkpoints.
+        query (str): Search term to check.
+        partition_by (str, optional): Facet the scrape was partitioned by.
+        
+    Returns:
+        bool: True if items or checkpoints of the query, or of any of its
+            partitions, or a partition plan for it are stored.
+    """
+    if library_db.get_item_count(query):
+        return True
+    if partition_by is not None and library_db.get_scrape_partitions(query, partition_by):
+        return True
+
+    return any(key == query or key.startswith(f"{query} [") for key in library_db.get_scrape_queries())
+
+def unfinished_queries(library_db: LibraryDB, queries: list, partition_by: str = None) -> list:
+    """List the queries of a run that a previous attempt left unfinished.
+    
+    A query is unfinished if its scrape stopped part way or, once any
+    query of the batch has stored progress, if it never started. When
+    every query has finished the list is empty, so the run starts over.
+    
+    Args:
+        library_db (LibraryDB): Database holding the scrape checkpoints.
+        queries (list): Search terms of the run.
+        partition_by (str, optional): Facet the scrapes are partitioned by.
+        
+    Returns:
+        list: Unfinished queries, in the order given.
+    """
+    started = [query for query in queries if has_scrape_progress(library_db, query, partition_by)]
+
+    return [query for query in queries
+            if is_scrape_incomplete(library_db, query, partition_by)
+            or (started and query not in started)]
+
+def search_key(query: str, filters: dict = None) -> str:
+    """Name a search for its checkpoints and archived pages.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        filters (dict, optional): Extra search parameters of a partition.
+    
+    Returns:
+        str: The query itself, or the query followed by its encoded
+            filters, e.g. "fantasy [f_FORMAT=EBOOK]".
+    """
+    if not filters:
+        return query
+
+    return f"{query} [{urlencode(sorted(filters.items()))}]"
+
+def _year_filters(first_year: int, last_year: int) -> dict:
+    """Build the catalog's publication date filters for a range of years.
+    
+    Args:
+        first_year (int): First publication year, inclusive.
+        last_year (int): Last publication year, inclusive.
+    
+    Returns:
+        dict: Search parameters restricting results to the range.
+    """
+    return {YEAR_FILTER_PARAMS[0]: first_year, YEAR_FILTER_PARAMS[1]: last_year}
+
+def _count_results(query: str, filters: dict, retry: RetryPolicy, rate: RateController) -> int:
+    """Read the result count of a search from its first page.
+    
+    Unlike _get_target_item_count, the request goes through the retry
+    policy and rate controller, and a failure is reported instead of
+    exiting.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        filters (dict): Extra search parameters, see _build_search_url.
+        retry (RetryPolicy): Retry settings for the request.
+        rate (RateController): Limiter the request passes through.
+    
+    Returns:
+        int: Total number of results, or None if the page could not be
+            fetched or its count could not be read.
+    """
+    key = search_key(query, filters)
+    try:
+        url = _build_search_url(BASE_URL, query, filters=filters)
+        library_html = retry.call(rate.call, _fetch_html, url)
+    except Exception as e:
+        print(f"Unable to count the results of '{key}': {e}")
+        return None
+
+    target_item_count, books = parse_search_page(library_html, fields=('link',))
+    if not target_item_count and books:
+        print(f"Unable to read the result count of '{key}'")
+        return None
+
+    return target_item_count
+
+def _year_partitions(query: str, max_items: int, rate: RateController, retry: RetryPolicy = None,
+                     total: int = None, first_year: int = FIRST_PUB_YEAR, last_year: int = None) -> list:
+    """Split a search into publication-year ranges of bounded size.
+    
+    Starts from one range covering every year and bisects any range
+    whose result count, as read by _count_results, is still above
+    max_items. The ranges of each round of bisection are counted
+    concurrently through the retry policy and rate controller. Ranges
+    without results are dropped, while a single year that is still too
+    large, or a range whose count cannot be read, is kept whole. Items
+    without a publication year fall outside every range, so the counts
+    of the ranges are compared with the search's total and any shortfall
+    is reported.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        max_items (int): Largest result count wanted per range.
+        rate (RateController): Limiter the count requests pass through.
+        retry (RetryPolicy, optional): Retry settings for the count
+            requests. Defaults to RetryPolicy().
+        total (int, optional): Result count of the whole search, compared
+            with the sum of the ranges.
+        first_year (int): First year covered. Default FIRST_PUB_YEAR.
+        last_year (int, optional): Last year covered. Defaults to next
+            year, so announced titles are included.
+    
+    Returns:
+        list: Filters dict of each range, oldest first.
+    """
+    retry = retry or RetryPolicy()
+    last_year = last_year or time.localtime().tm_year + 1
+    partitions = []
+    pending = [(first_year, last_year)]
+
+    def count(years):
+        return _count_results(query, _year_filters(*years), retry, rate)
+
+    with ThreadPoolExecutor(max_workers=rate.max_concurrency) as executor:
+        while pending:
+            counts = list(executor.map(count, pending))
+            bisected = []
+            for (start, end), item_count in zip(pending, counts):
+                if item_count == 0:
+                    continue
+                if item_count is None:
+                    print(f"Crawling {start}-{end} of '{query}' as one partition")
+                elif item_count > max_items and start < end:
+                    middle = (start + end) // 2
+                    bisected += [(start, middle), (middle + 1, end)]
+                    continue
+                elif item_count > max_items:
+                    print(f"Year {start} has {item_count} results, more than {max_items}; "
+                          f"crawling it as one partition")
+                partitions.append((start, end, item_count))
+            pending = bisected
+
+    partitions.sort()
+    print(f"Split '{query}' into {len(partitions)} year ranges: "
+          + ", ".join(f"{start}-{end} ({'?' if item_count is None else item_count})"
+                      for start, end, item_count in partitions))
+    counts = [item_count for _, _, item_count in partitions]
+    covered = sum(item_count or 0 for item_count in counts)
+    if total is not None and None not in counts and covered < total:
+        print(f"Warning: the year ranges of '{query}' hold {covered} of its {total} results; "
+              f"{total - covered} items without a publication year, or published before "
+              f"{first_year}, will not be scraped")
+
+    return [_year_filters(start, end) for start, end, _ in partitions]
+
+def _partition_filters(partition_by: str, query: str = None,
+                       max_items: int = MAX_PARTITION_ITEMS, rate: RateController = None,
+                       retry: RetryPolicy = None, total: int = None) -> list:
+    """Work out the filters of each partition of a search.
+    
+    Args:
+        partition_by (str): Facet to partition by, or None.
+        query (str, optional): Search term, needed to size year ranges.
+        max_items (int): Largest result count wanted per year range.
+            Default MAX_PARTITION_ITEMS.
+        rate (RateController, optional): Limiter for the count requests
+            made to size year ranges. Defaults to RateController().
+        retry (RetryPolicy, optional): Retry settings for those requests.
+        total (int, optional): Result count of the whole search, checked
+            against the year ranges.
+    
+    Returns:
+        list: One filters dict per partition, or [None] for a whole search.
+    
+    Raises:
+        ValueError: If the facet is not in PARTITION_FACETS.
+    """
+    if partition_by is None:
+        return [None]
+    if partition_by not in PARTITION_FACETS:
+        raise ValueError(f"Unknown partition facet: {partition_by}")
+    if partition_by == "year":
+        return _year_partitions(query, max_items, rate or RateController(), retry, total)
+
+    return [{'f_FORMAT': format_code} for format_code in FORMAT_FILTER.split('|')]
+
+def iter_library_data(query: str, progress: tuple = None, browser_fallback: bool = False,
+                      concurrency: int = 1, engine: str = "http", num_drivers: int = 1,
+                      lean_browser: bool = True, retry: RetryPolicy = None,
+                      rate: RateController = None, parse_workers: int = 0,
+                      parse_chunksize: int = 1, parse_cache: ParseCache = None,
+                      dead_letters: list = None, fields=None,
+                      archive: PageArchive = None, filters: dict = None,
+                      driver_pool: _DriverPool = None,
+                      parse_executor: ProcessPoolExecutor = None) -> tuple:
+    """Stream search results page by page as batches of Book records.
+    
+    Fetches and parses every results page of a query and yields each
+    page's books in page order, without storing them. Only a bounded
+    window of pages is fetched ahead of the consumer, every request goes
+    through the RateController and RetryPolicy, and pages that still fail
+    are collected in dead_letters instead of ending the run. The other
+    scrape functions take the same fetch and parse options.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        progress (tuple, optional): (target_item_count, completed_pages) of
+            an earlier partial run, from LibraryDB.get_scrape_progress.
+            Completed pages are skipped.
+        browser_fallback (bool): Re-render pages without result cards in
+            Chrome. Default False.
+        concurrency (int): Maximum number of pages downloaded at once.
+            Default 1.
+        engine (str): "http" to download pages or "browser" to render them
+            in Chrome. Default "http".
+        num_drivers (int): Chrome instances of the browser engine, capped
+            at MAX_DRIVERS. Default 1.
+        lean_browser (bool): Block non-essential resources in Chrome.
+            Default True.
+        retry (RetryPolicy, optional): Per-page retry settings.
+        rate (RateController, optional): Adaptive request limiter. Defaults
+            to one capped at concurrency, or num_drivers in the browser.
+        parse_workers (int): Worker processes for parsing; 0 parses in
+            this process. Default 0.
+        parse_chunksize (int): Pages per parse worker task. Default 1.
+        parse_cache (ParseCache, optional): Skips parsing pages whose
+            results are unchanged.
+        dead_letters (list, optional): Receives the page numbers that still
+            failed after all retries.
+        fields (iterable, optional): Book attributes to extract, from
+            parser.BOOK_FIELDS; the others are left as None.
+        archive (PageArchive, optional): Receives every fetched page under
+            search_key(query, filters), for reparse_archive.
+        filters (dict, optional): Extra search parameters of a partition.
+        driver_pool (_DriverPool, optional): Chrome pool shared with other
+            scrapes, left open.
+        parse_executor (ProcessPoolExecutor, optional): Parse pool shared
+            with other scrapes, left running.
+        
+    Yields:
+        tuple: (page_number, target_item_count, books) for each page with results.
+        
+    Raises:
+        RuntimeError: If the first results page cannot be fetched.
+        SessionNotCreatedException: If the browser engine cannot start Chrome.
+        ValueError: If fields names an unknown attribute.
+    """
+    fields = normalize_fields(fields)
+    retry = retry or RetryPolicy()
+    owns_pool, owns_executor = driver_pool is None, parse_executor is None
+    pool = driver_pool or _DriverPool(num_drivers if engine == "browser" else 1, lean=lean_browser)
+    rate = rate or RateController(max_concurrency=pool.size if engine == "browser" else concurrency)
+    timer = _StageTimer()
+    if owns_executor and parse_workers > 0:
+        parse_executor = ProcessPoolExecutor(max_workers=parse_workers)
+    dead_letters = dead_letters if dead_letters is not None else []
+    key = search_key(query, filters)
+
+    def fetch_page(url, page_number, render=engine == "browser"):
+        try:
+            if render:
+                return retry.call(rate.call, pool.render, url, page_number)
+            return retry.call(rate.call, _fetch_html, url)
+        except SessionNotCreatedException as e:
+            if engine == "browser":
+                # Without Chrome no page can be fetched; the driver pool hands
+                # the page to another driver, or the search fails
+                raise
+            print(f"Giving up on page {page_number}: {e}")
+            return None
+        except Exception as e:
+            print(f"Giving up on page {page_number}: {e}")
+            return None
+
+    def archive_page(page_number, library_html):
+        if archive is not None and library_html is not None:
+            with timer.stage("archive"):
+                archive.add_page(key, page_number, library_html)
+
+    def parse_with_fallback(page_number, url, parsed):
+        target_item_count, books = parsed
+        if not books and browser_fallback and engine == "http":
+            print(f"Page {page_number} returned no results over HTTP, rendering with Chrome...")
+            with timer.stage("fetch"):
+                library_html = fetch_page(url, page_number, render=True)
+            if library_html is None:
+                return target_item_count, books
+            archive_page(page_number, library_html)
+            with timer.stage("parse"):
+                target_item_count, books = parse_search_page(library_html, fields=fields)
+
+        return target_item_count, books
+
+    def iter_pages(page_numbers):
+        if engine == "browser":
+            return _iter_pages_driver_pool(query, page_numbers, fetch_page, pool, filters)
+        if concurrency > 1:
+            return _iter_pages_async(query, page_numbers, fetch_page, concurrency, filters)
+        return _iter_pages_prefetch(query, page_numbers, fetch_page, filters)
+
+    try:
+        target_item_count, completed_pages = progress or (None, set())
+        completed_pages = set(completed_pages)
+        if not completed_pages:
+            # Page 1 supplies both the result count and the first batch of cards
+            url = _build_search_url(BASE_URL, query, 1, filters)
+            with timer.stage("fetch"):
+                library_html = fetch_page(url, 1)
+            if library_html is None:
+                raise RuntimeError(f"Unable to fetch the first results page for '{key}'")
+            archive_page(1, library_html)
+            timer.pages += 1
+            first_page = iter([(1, url, library_html)])
+            _, _, _, parsed = next(_iter_parsed_pages(first_page, timer, cache=parse_cache,
+                                                      fields=fields))
+            target_item_count, books = parse_with_fallback(1, url, parsed)
+            if target_item_count == 0:
+                return
+            if books:
+                completed_pages.add(1)
+                with timer.stage("consume"):
+                    yield 1, target_item_count, books
+
+        page_count = _get_page_count(target_item_count)
+        for scrape_pass in range(MAX_SCRAPE_PASSES):
+            missing_pages = [n for n in range(1, page_count + 1)
+                             if n not in completed_pages and n not in dead_letters]
+            if not missing_pages:
+                break
+            if scrape_pass > 0:
+                print(f"Refetching {len(missing_pages)} missing pages: {missing_pages}")
+
+            pages = _iter_parsed_pages(iter_pages(missing_pages), timer, parse_executor,
+                                       parse_workers, parse_chunksize, parse_cache, fields)
+            for page_number, url, library_html, parsed in pages:
+                if library_html is None:
+                    dead_letters.append(page_number)
+                    continue
+
+                archive_page(page_number, library_html)
+                timer.pages += 1
+                _, books = parse_with_fallback(page_number, url, parsed)
+                if books:
+                    completed_pages.add(page_number)
+                    with timer.stage("consume"):
+                        yield page_number, target_item_count, books
+                else:
+                    print(f"Page {page_number} returned no results, it will be refetched")
+
+        print(timer.report())
+        if parse_cache is not None:
+            print(f"Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses")
+
+    finally:
+        if owns_pool:
+            pool.close()
+        if owns_executor and parse_executor is not None:
+            parse_executor.shutdown(cancel_futures=True)
+
+def _iter_partitions(query: str, partitions: list, progress: dict, dead_letters: dict,
+                     failed: list, **options) -> tuple:
+    """Crawl the partitions of a query in parallel and merge their batches.
+    
+    Each partition is streamed by iter_library_data in its own thread and
+    its batches are handed to the caller through one bounded queue, so a
+    single consumer stores every page and a slow consumer holds back all
+    partitions instead of letting batches pile up in memory. A partition
+    that fails is reported and skipped without stopping the others.
+    
+    Args:
+        query (str): Search term for library catalog lookup.
+        partitions (list): Filters dict of each partition.
+        progress (dict): search_key -> (target_item_count, completed_pages)
+            of an earlier partial run of each partition.
+        dead_letters (dict): search_key -> list receiving the pages of that
+            partition that still failed after all retries.
+        failed (list): Receives the search_key of every partition that
+            stopped with an error.
+        **options: Further iter_library_data arguments shared by every
+            partition, such as rate, driver_pool and parse_executor.
+    
+    Yields:
+        tuple: (filters, page_number, target_item_count, books) for each
+            page with results, in the order pages complete.
+    """
+    batches = queue.Queue(maxsize=PARTITION_QUEUE_SIZE)
+    stop = threading.Event()
+    done = object()
+
+    def offer(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def crawl(filters):
+        key = search_key(query, filters)
+        pages = iter_library_data(query, progress[key], dead_letters=dead_letters[key],
+                                  filters=filters, **options)
+        try:
+            for page_number, target_item_count, books in pages:
+                if not offer((filters, page_number, target_item_count, books)):
+                    break
+        except Exception as e:
+            print(f"Unable to scrape '{key}': {e}")
+            failed.append(key)
+        finally:
+            pages.close()
+            offer(done)
+
+    threads = [threading.Thread(target=crawl, args=(filters,), daemon=True)
+               for filters in partitions]
+    for thread in threads:
+        thread.start()
+
+    try:
+        running = len(threads)
+        while running:
+            item = batches.get()
+            if item is done:
+                running -= 1
+            else:
+                yield item
+
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+def scrape_library_data(library_db: LibraryDB, query: str, browser_fallback: bool = False,
+                        concurrency: int = 1, engine: str = "http", num_drivers: int = 1,
+                        lean_browser: bool = True, retry: RetryPolicy = None,
+                        rate: RateController = None, parse_workers: int = 0,
+                        parse_chunksize: int = 1, parse_cache: ParseCache = None,
+                        fields=None, archive: PageArchive = None,
+                        partition_by: str = None,
+                        max_partition_items: int = MAX_PARTITION_ITEMS,
+                        driver_pool: _DriverPool = None,
+                        parse_executor: ProcessPoolExecutor = None,
+                        weighted_averages: bool = True) -> list:
     """Scrape library catalog data and populate database.
     
-    Main scraping function that iterates through search result pages,
-    extracts book metadata from each item, and stores it in the database.
-    Handles pagination automatically and calculates Bayesian weighted ratings.
+    Stores each page from iter_library_data as it arrives, with a
+    checkpoint, so a rerun fetches only the missing pages. With
+    partition_by the query is split by a catalog facet and the
+    partitions are crawled in parallel under one RateController; their
+    plan is recorded, so a rerun resumes every unfinished partition.
+    Calculates Bayesian weighted ratings once the query is stored.
     
     Args:
         library_db (LibraryDB): Database instance to store scraped data.
         query (str): Search term for library catalog lookup.
+        partition_by (str, optional): Facet to partition the query by,
+            see PARTITION_FACETS. Default None crawls it whole.
+        max_partition_items (int): Largest result count of a year range.
+            Default MAX_PARTITION_ITEMS.
+        weighted_averages (bool): Recalculate the weighted ratings at the
+            end. Default True.
+        browser_fallback, concurrency, engine, num_drivers, lean_browser,
+            retry, rate, parse_workers, parse_chunksize, parse_cache,
+            fields, archive, driver_pool, parse_executor: Fetch and parse
+            options, see iter_library_data.
+        
+    Returns:
+        list: Page numbers that still failed after all retries, or
+            (search_key, page_number) tuples when partitioned.
         
     Raises:
         SystemExit: If no results found or scraping fails.
     """
+    if rate is None:
+        max_concurrency = max(1, min(num_drivers, MAX_DRIVERS)) if engine == "browser" else concurrency
+        rate = RateController(max_concurrency=max_concurrency)
+    owns_pool, owns_executor = driver_pool is None, parse_executor is None
+    pool = driver_pool or _DriverPool(num_drivers if engine == "browser" else 1, lean=lean_browser)
+    if owns_executor and parse_workers > 0:
+        parse_executor = ProcessPoolExecutor(max_workers=parse_workers)
+
     try:
-        driver = _get_driver(headless=True)
-        page_number = 1
-        base_url = "https://calgary.bibliocommons.com/v2/search"
-        target_item_count = _get_target_item_count(base_url, query)
-        if target_item_count == 0:
-            print(f"No results found for '{query}'. Please try another search term.")
+        partitioned = partition_by is not None
+        planned = library_db.get_scrape_partitions(query, partition_by) if partitioned else []
+        total = _count_results(query, None, retry or RetryPolicy(), rate) if partitioned else None
+        if planned:
+            print(f"Resuming the {len(planned)} planned partitions of '{query}'...")
+            partitions = [filters for _, filters, _ in planned]
+        else:
+            partitions = _partition_filters(partition_by, query, max_partition_items, rate,
+                                            retry, total)
+        keys = [search_key(query, filters) for filters in partitions]
+        if partitioned and not planned:
+            library_db.add_scrape_partitions(query, partition_by, list(zip(keys, partitions)))
+        progress = {key: library_db.get_scrape_progress(key) for key in keys}
+        dead_letters = {key: [] for key in keys}
+        failed = []
+        for key in keys:
+            if progress[key][1]:
+                print(f"Resuming '{key}' with {len(progress[key][1])} pages already stored...")
+
+        options = dict(browser_fallback=browser_fallback, concurrency=concurrency, engine=engine,
+                       num_drivers=num_drivers, lean_browser=lean_browser, retry=retry, rate=rate,
+                       parse_workers=parse_workers, parse_chunksize=parse_chunksize,
+                       parse_cache=parse_cache, fields=fields, archive=archive,
+                       driver_pool=pool, parse_executor=parse_executor)
+        if partitioned:
+            print(f"Crawling '{query}' in {len(partitions)} partitions by {partition_by}...")
+            batches = _iter_partitions(query, partitions, progress, dead_letters, failed, **options)
+        else:
+            batches = ((None,) + batch for batch in iter_library_data(
+                query, progress[query], dead_letters=dead_letters[query], **options))
+
+        for filters, page_number, target_item_count, books in batches:
+            key = search_key(query, filters)
+            completed_pages = progress[key][1]
+            progress[key] = (target_item_count, completed_pages)
+            if partitioned:
+                print(f"Merging page {page_number} of '{key}'... "
+                      f"(collected {library_db.get_item_count(query)}) [{rate.status()}]")
+            else:
+                print(f"Scraping page {page_number}... (collected {library_db.get_item_count(query)}/"
+                      f"{target_item_count}) [{rate.status()}]")
+            library_db.add_page(key, page_number, target_item_count, books, query)
+            completed_pages.add(page_number)
+
+        if all(target_item_count is None for target_item_count, _ in progress.values()):
+            if failed or any(dead_letters.values()):
+                print(f"Unable to fetch any results for '{query}'.")
+            else:
+                print(f"No results found for '{query}'. Please try another search term.")
             sys.exit(1)
 
-        prev_item_count = 0
-        while library_db.get_item_count() < target_item_count:
-            print(f"Scraping page {page_number}... (collected {library_db.get_item_count()}/{target_item_count})")
-            params = {
-                'query': query,
-                'searchType': 'tag',
-                'locked': 'true',
-                'f_FORMAT': 'BK|EBOOK|GRAPHIC_NOVEL|LPRINT|BOARD_BK|PAPERBACK',
-                'page': page_number
-            }
-            
-            url = f"{base_url}?{urlencode(params)}"
-            driver.get(url)
-            library_html = driver.page_source
-            soup = BeautifulSoup(library_html, 'lxml')
-            book_cards = soup.find_all('div', class_='cp-search-result-item-content')
-
-            for book_card in book_cards:
-                book = Book()
-                book.title = book_card.find('span', class_='title-content').text
-                try:
-                    subtitle = book_card.find('span', class_='cp-subtitle').text
-                    book.title += f": {subtitle}"
-                except:
-                    pass
-                try:
-                    author = book_card.find('a', class_='author-link').text
-                    last, first = author.split(",", 1)
-                    last = last.replace(" ", "")
-                    first = re.sub(r'\.\s+', '.', first.strip())
-                    book.author = f"{last}, {first}"
-                except:
-                    pass
-                try:
-                    book.format = book_card.find('span', class_='display-info-primary').text.split(', ')[0]
-                except:
-                    pass
-                try:
-                    book.pub_year = int(book_card.find('span', class_='display-info-primary').text.split(', ')[1])
-                    if book.pub_year < 1000:
-                        book.pub_year = None
-                except:
-                    pass
-                try:
-                    book.rating = float(book_card.find('span', class_='cp-rating-stars rating-stars').span.text.split(' ')[2])
-                    book.num_ratings = int(book_card.find('span', class_='rating-count').text.strip('(,)').split(' ')[0].replace(',',''))
-                except:
-                    pass
-                try:
-                    book.link = book_card.find('h2', class_='cp-title').a['href']
-                except:
-                    pass
-                
-                library_db.add_library_item(book)
-            
-            if library_db.get_item_count() == prev_item_count:
-                break
+        for key in keys:
+            target_item_count, completed_pages = progress[key]
+            label = f" of '{key}'" if partitioned else ""
+            if target_item_count is None:
+                if key not in failed:
+                    print(f"No results found for '{key}'.")
+                    if partitioned:
+                        library_db.set_scrape_partition_done(query, key)
+                continue
 
-            page_number += 1
-            prev_item_count = library_db.get_item_count()
+            page_count = _get_page_count(target_item_count)
+            missing_pages = [n for n in range(1, page_count + 1) if n not in completed_pages]
+            if dead_letters[key]:
+                print(f"Pages{label} that failed after all retries: {sorted(dead_letters[key])}")
+            if missing_pages:
+                print(f"Scrape incomplete{label}: pages {missing_pages} could not be retrieved. "
+                      f"Run the same search again to resume.")
+            elif partitioned:
+                library_db.set_scrape_partition_done(query, key)
+            elif target_item_count != library_db.get_item_count(query):
+                print(f"Catalog reported {target_item_count} items but "
+                      f"{library_db.get_item_count(query)} were stored.")
 
-        driver.quit()
+        if (partitioned and total is not None
+                and all(done for _, _, done in library_db.get_scrape_partitions(query, partition_by))
+                and total != library_db.get_item_count(query)):
+            print(f"Catalog reported {total} items for '{query}' but "
+                  f"{library_db.get_item_count(query)} were stored across its partitions.")
 
-        if target_item_count != library_db.get_item_count():
-            print("Scrape incomplete. Restarting the process...")
-            library_db.create_table()
-            scrape_library_data(library_db, query)
+        if weighted_averages:
+            library_db.set_weighted_averages()
 
-        library_db.set_weighted_averages()
+        if partitioned:
+            return sorted((key, page_number) for key in keys for page_number in dead_letters[key])
+        return sorted(dead_letters[query])
 
     except Exception as e:
         print(f"Unable to scrape data: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+    finally:
+        if owns_pool:
+            pool.close()
+        if owns_executor and parse_executor is not None:
+            parse_executor.shutdown(cancel_futures=True)
+
+def scrape_queries(library_db: LibraryDB, queries, concurrency: int = 1, engine: str = "http",
+                   num_drivers: int = 1, lean_browser: bool = True, rate: RateController = None,
+                   parse_workers: int = 0, **options) -> dict:
+    """Scrape a batch of queries into one database.
+    
+    Each query is stored with scrape_library_data, while the Chrome pool,
+    parse pool and RateController are shared by the whole batch and the
+    weighted ratings are calculated once, at the end. Queries that are
+    already fully checkpointed are skipped, and a query that fails is
+    reported without stopping the batch.
+    
+    Args:
+        library_db (LibraryDB): Database instance to store scraped data.
+        queries (iterable): Search terms. Blank and repeated ones are skipped.
+        concurrency, engine, num_drivers, lean_browser, rate,
+            parse_workers: Fetch and parse options shared by every query,
+            see iter_library_data.
+        **options: Further scrape_library_data arguments applied to every
+            query, such as retry, parse_cache, archive or partition_by.
+        
+    Returns:
+        dict: Query -> failed pages as returned by scrape_library_data, or
+            None if the query had no results or could not be scraped.
+    """
+    queries = list(dict.fromkeys(query.strip() for query in queries if query.strip()))
+    if rate is None:
+        max_concurrency = max(1, min(num_drivers, MAX_DRIVERS)) if engine == "browser" else concurrency
+        rate = RateController(max_concurrency=max_concurrency)
+    pool = _DriverPool(num_drivers if engine == "browser" else 1, lean=lean_browser)
+    parse_executor = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else None
+    results = {}
+
+    try:
+        for number, query in enumerate(queries, 1):
+            print(f"\n[{number}/{len(queries)}] Searching for '{query}'...")
+            try:
+                results[query] = scrape_library_data(
+                    library_db, query, concurrency=concurrency, engine=engine,
+                    num_drivers=num_drivers, lean_browser=lean_browser, rate=rate,
+                    parse_workers=parse_workers, driver_pool=pool,
+                    parse_executor=parse_executor, weighted_averages=False, **options)
+            except SystemExit:
+                # scrape_library_data has already reported why the query stopped
+                results[query] = None
+
+        library_db.set_weighted_averages()
+        failed = [query for query, dead_letters in results.items() if dead_letters is None]
+        print(f"\nScraped {len(queries) - len(failed)} of {len(queries)} queries "
+              f"({library_db.get_item_count()} items).")
+        if failed:
+            print(f"Queries without results: {failed}")
+
+        return results
+
+    finally:
+        pool.close()
+        if parse_executor is not None:
+            parse_executor.shutdown(cancel_futures=True)
+
+def enrich_library_items(library_db: LibraryDB, max_age: float = DETAIL_MAX_AGE,
+                         concurrency: int = DETAIL_CONCURRENCY, retry: RetryPolicy = None,
+                         rate: RateController = None, response_cache: ResponseCache = None,
+                         links: list = None) -> int:
+    """Fetch item detail pages and store the fields search cards lack.
+    
+    Fills the item_details table with each stored item's ISBN, page
+    count, subjects, series and language. Items enriched within max_age
+    seconds are skipped, so repeated runs only fetch new or stale items.
+    Detail pages are downloaded by a pool of `concurrency` threads, with
+    every request passing through the RateController and RetryPolicy, and
+    at most twice that many pages are scheduled ahead of the consumer.
+    A ResponseCache answers for pages fetched within its own ttl without
+    a request. Details are stored DETAIL_BATCH_SIZE items per transaction;
+    items whose page still fails after all retries are left for the next
+    run.
+    
+    Args:
+        library_db (LibraryDB): Database holding the items to enrich.
+        max_age (float): Seconds an item's details stay fresh. Default
+            DETAIL_MAX_AGE.
+        concurrency (int): Maximum number of detail pages downloaded at
+            once. Default DETAIL_CONCURRENCY.
+        retry (RetryPolicy, optional): Per-page retry settings. Defaults
+            to RetryPolicy().
+        rate (RateController, optional): Adaptive request limiter. Defaults
+            to a controller capped at concurrency.
+        response_cache (ResponseCache, optional): Cache of fetched detail pages.
+        links (list, optional): Item links to enrich. Defaults to every
+            stored item that is not enriched or has gone stale.
+        
+    Returns:
+        int: Number of items enriched.
+    """
+    retry = retry or RetryPolicy()
+    rate = rate or RateController(max_concurrency=concurrency)
+    links = library_db.get_links_to_enrich(max_age) if links is None else links
+    timer = _StageTimer()
+    pending = {}
+
+    def fetch_details(link):
+        url = urljoin(BASE_URL, link)
+        library_html = response_cache.get(url) if response_cache is not None else None
+        if library_html is None:
+            try:
+                library_html = retry.call(rate.call, _fetch_html, url)
+            except Exception as e:
+                print(f"Giving up on the details of {link}: {e}")
+                return None
+            if response_cache is not None:
+                response_cache.put(url, library_html)
+
+        return parse_item_details(library_html, link)
+
+    def store_pending():
+        with timer.stage("store"):
+            library_db.add_item_details(pending)
+        timer.pages += len(pending)
+        pending.clear()
+        print(f"Enriched {timer.pages}/{len(links)} items [{rate.status()}]")
+
+    def collect():
+        link, future = window.popleft()
+        with timer.stage("fetch"):
+            details = future.result()
+        if details is not None:
+            pending[link] = details
+        if len(pending) >= DETAIL_BATCH_SIZE:
+            store_pending()
+
+    print(f"Enriching {len(links)} items with detail page fields...")
+    window = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for link in links:
+                window.append((link, executor.submit(fetch_details, link)))
+                if len(window) >= concurrency * 2:
+                    collect()
+            while window:
+                collect()
+
+        finally:
+            for _, future in window:
+                future.cancel()
+            if pending:
+                store_pending()
+
+    print(timer.report())
+    if response_cache is not None:
+        print(f"Response cache: {response_cache.hits} hits, {response_cache.misses} misses")
+
+    return timer.pages
+
+def reparse_archive(library_db: LibraryDB, archive: PageArchive, query: str,
+                    parse_workers: int = 0, parse_chunksize: int = 1, fields=None) -> int:
+    """Rebuild a query's library items from archived pages.
+    
+    Parses the latest archived fetch of every page of the query and
+    stores the books with their checkpoints, exactly as a scrape would,
+    but without touching the network. Pages archived by a partitioned
+    scrape are re-parsed partition by partition. Call
+    LibraryDB.create_table() first to rebuild the table from scratch.
+    
+    Args:
+        library_db (LibraryDB): Database instance to store parsed data.
+        archive (PageArchive): Archive holding the fetched pages.
+        query (str): Search term whose pages should be re-parsed.
+        parse_workers (int): Worker processes for parsing; 0 parses in
+            this process. Default 0.
+        parse_chunksize (int): Pages handed to a parse worker per task. Default 1.
+        fields (iterable, optional): Book attributes to extract, from
+            parser.BOOK_FIELDS. Default None extracts every field.
+        
+    Returns:
+        int: Number of archived pages that were re-parsed.
+    """
+    fields = normalize_fields(fields)
+    timer = _StageTimer()
+    parse_executor = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else None
+    keys = [key for key, _, _ in archive.get_queries()
+            if key == query or key.startswith(f"{query} [")]
+
+    try:
+        for key in keys:
+            archived_pages = ((page_number, _build_search_url(BASE_URL, query, page_number), library_html)
+                              for page_number, _, library_html in archive.iter_pages(key))
+            pages = _iter_parsed_pages(archived_pages, timer, parse_executor, parse_workers,
+                                       parse_chunksize, fields=fields)
+            for page_number, _, _, (target_item_count, books) in pages:
+                timer.pages += 1
+                if books:
+                    with timer.stage("store"):
+                        library_db.add_page(key, page_number, target_item_count, books, query)
+
+        if timer.pages:
+            print(timer.report())
+            library_db.set_weighted_averages()
+
+        return timer.pages
+
+    finally:
+        if parse_executor is not None:
+            parse_executor.shutdown(cancel_futures=True)
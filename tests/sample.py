@@ -9,6 +9,8 @@ __author__ = "Abiola Raji"
 __version__ = "1.0"
 __date__ = "2025-09-03"
 
+import json
+
 library_items_sample = [
     ("The Hobbit", "Tolkien, J.R.R.", "BOOK", 1937, 4.25, 2150000, 4.25, "/catalog/12345"),
     ("Dune", "Herbert, Frank", "PAPERBACK", 1965, 4.21, 890000, 4.21, "/catalog/12346"),
@@ -30,4 +32,149 @@ library_items_sample = [
     ("American Gods", "Gaiman, Neil", "GRAPHIC NOVEL", 2001, 4.11, 420000, 4.11, "/catalog/12362"),
     ("The Name of the Wind", "Rothfuss, Patrick", "BOOK", 2007, 4.52, 280000, 4.52, "/catalog/12363"),
     ("Good Omens", "Pratchett, Terry", "BOOK", 1990, 4.25, 340000, 4.25, "/catalog/12364")
-]
\ No newline at end of file
+]
+
+search_page_sample = """<!DOCTYPE html>
+<html>
+<head><title>Search | Calgary Public Library</title></head>
+<body>
+<header class="cp-header"><a class="author-link" href="/v2/search">Not, A Card</a></header>
+<div class="cp-search-results">
+<ul class="results">
+<li class="cp-search-result-item">
+<div class="cp-search-result-item-content">
+<h2 class="cp-title"><a href="/v2/record/S114C1369884095" class="title-link"><span class="title-content">The Hobbit</span><span class="cp-subtitle">Or, There and Back Again</span></a></h2>
+<span class="cp-author-link"><a class="author-link" href="/v2/search?query=tolkien">Tolkien, J. R. R.</a></span>
+<span class="cp-author-link"><a class="author-link" href="/v2/search?query=lee">Lee, Alan</a></span>
+<div class="cp-format-info"><span class="display-info-primary">Book, 2012</span></div>
+<div class="cp-ratings"><span class="cp-rating-stars rating-stars"><span class="cp-screen-reader-message">Average rating 4.6 out of 5 stars</span></span><span class="rating-count">(1,234 ratings)</span></div>
+</div>
+</li>
+<li class="cp-search-result-item">
+<div class="cp-search-result-item-content">
+<h2 class="cp-title"><a href="/v2/record/S114C2231570" class="title-link"><span class="title-content">Dune</span></a></h2>
+<span class="cp-author-link"><a class="author-link" href="/v2/search?query=herbert">Herbert, Frank</a></span>
+<div class="cp-format-info"><span class="display-info-primary">eBook, 2019</span></div>
+</div>
+</li>
+<li class="cp-search-result-item">
+<div class="cp-search-result-item-content">
+<h2 class="cp-title"><a href="/v2/record/S114C998877" class="title-link"><span class="title-content">Beowulf</span></a></h2>
+<span class="cp-author-link"><a class="author-link" href="/v2/search?query=anonymous">Anonymous</a></span>
+<div class="cp-format-info"><span class="display-info-primary">Paperback, 975</span></div>
+<div class="cp-ratings"><span class="cp-rating-stars rating-stars"><span class="cp-screen-reader-message">Average rating 3.9 out of 5 stars</span></span><span class="rating-count">(87 ratings)</span></div>
+</div>
+</li>
+<li class="cp-search-result-item">
+<div class="cp-search-result-item-content">
+<h2 class="cp-title"><a href="/v2/record/S114C5550001" class="title-link"><span class="title-content">Maus</span></a></h2>
+<div class="cp-format-info"><span class="display-info-primary">Graphic Novel</span></div>
+</div>
+</li>
+</ul>
+<div class="cp-pagination"><span class="cp-pagination-label">1 to 20 of 1,234 results</span></div>
+</div>
+<footer class="cp-footer"><span class="display-info-primary">Footer, 1999</span></footer>
+</body>
+</html>
+"""
+
+search_page_sample_items = [
+    ("The Hobbit: Or, There and Back Again", "Tolkien, J.R.R.", "Book", 2012, 4.6, 1234, "/v2/record/S114C1369884095"),
+    ("Dune", "Herbert, Frank", "eBook", 2019, None, None, "/v2/record/S114C2231570"),
+    ("Beowulf", None, "Paperback", None, 3.9, 87, "/v2/record/S114C998877"),
+    ("Maus", None, "Graphic Novel", None, None, None, "/v2/record/S114C5550001"),
+]
+
+search_state_sample = {
+    "app": {"locale": "en-CA", "siteId": "114"},
+    "entities": {
+        "bibs": {
+            "S114C1369884095": {
+                "id": "S114C1369884095",
+                "briefInfo": {"title": "The Hobbit", "subtitle": "Or, There and Back Again",
+                              "authors": ["Tolkien, J. R. R.", "Lee, Alan"], "format": "BK",
+                              "publicationDate": "2012"},
+                "rating": {"averageRating": 4.6, "totalCount": 1234},
+            },
+            "S114C2231570": {
+                "id": "S114C2231570",
+                "briefInfo": {"title": "Dune", "authors": ["Herbert, Frank"], "format": "EBOOK",
+                              "publicationDate": "[2019]"},
+            },
+            "S114C998877": {
+                "id": "S114C998877",
+                "briefInfo": {"title": "Beowulf", "authors": ["Anonymous"], "format": "PAPERBACK",
+                              "publicationDate": "975"},
+                "rating": {"averageRating": 3.9, "totalCount": 87},
+            },
+            "S114C5550001": {
+                "id": "S114C5550001",
+                "briefInfo": {"title": "Maus", "authors": [], "format": "GRAPHIC_NOVEL"},
+            },
+        },
+    },
+    "search": {
+        "catalogSearch": {
+            "pagination": {"count": 1234, "page": 1, "pages": 62, "limit": 20},
+            "results": [
+                {"representative": "S114C1369884095"},
+                {"representative": "S114C2231570"},
+                {"representative": "S114C998877"},
+                {"representative": "S114C5550001"},
+            ],
+        },
+    },
+}
+
+search_page_state_sample = search_page_sample.replace(
+    "</head>",
+    f'<script type="application/json" data-iso-key="_0">{json.dumps(search_state_sample)}</script></head>')
+
+item_page_sample = """<!DOCTYPE html>
+<html lang="en">
+<head><title>The Hobbit | Calgary Public Library | BiblioCommons</title></head>
+<body>
+<h1 class="cp-title">The Hobbit</h1>
+<div class="cp-bib-details">
+<dl>
+<dt>ISBN:</dt><dd>978-0-261-10221-7 (paperback)</dd>
+<dt>Characteristics:</dt><dd>xii, 310 pages : illustrations ; 20 cm</dd>
+<dt>Subjects:</dt><dd><ul><li><a href="/v2/search?query=dragons">Dragons</a></li><li><a href="/v2/search?query=wizards">Wizards</a></li></ul></dd>
+<dt>Series:</dt><dd>Middle-earth universe</dd>
+<dt>Language:</dt><dd>English</dd>
+<dt>Call Number:</dt><dd>TOL</dd>
+</dl>
+</div>
+</body>
+</html>
+"""
+
+item_page_sample_details = {
+    "isbn": "9780261102217",
+    "page_count": 310,
+    "subjects": ["Dragons", "Wizards"],
+    "series": "Middle-earth universe",
+    "language": "English",
+}
+
+item_state_sample = {
+    "entities": {
+        "bibs": {
+            "S114C1369884095": {
+                "id": "S114C1369884095",
+                "briefInfo": {"title": "The Hobbit", "isbns": ["9780261102217", "0261102214"],
+                              "physicalDescription": ["310 pages"], "primaryLanguage": "English"},
+                "subjects": ["Dragons", "Wizards"],
+            },
+            "S114C2231570": {
+                "id": "S114C2231570",
+                "briefInfo": {"title": "Dune", "isbns": ["9780441013593"]},
+            },
+        },
+    },
+}
+
+item_page_state_sample = """<html><head><script type="application/json">""" + json.dumps(item_state_sample) + """</script></head>
+<body><dl><dt>Series</dt><dd>Middle-earth universe</dd></dl></body></html>
+"""
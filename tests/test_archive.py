@@ -0,0 +1,99 @@
+"""test_archive.py - Unit tests for the compressed page archive.
+
+Tests storing and reading back compressed search result pages, lookups
+by fetch time and streaming the latest fetch of every page of a query.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+import pytest
+import sqlite3
+from src import PageArchive
+from .sample import search_page_sample, search_page_state_sample
+
+@pytest.fixture
+def archive(tmp_path):
+    """Create an empty archive in a temporary directory.
+    
+    Args:
+        tmp_path: Pytest temporary directory fixture.
+    
+    Returns:
+        PageArchive: Archive stored in the temporary directory.
+    """
+    return PageArchive(str(tmp_path / "archive.db"))
+
+def test_add_and_get_page(archive):
+    """Test that archived pages are stored compressed and read back intact."""
+    assert archive.get_page("test", 1) is None
+
+    archive.add_page("test", 1, search_page_sample)
+
+    assert archive.get_page("test", 1) == search_page_sample
+    assert archive.get_page("test", 2) is None
+    assert archive.get_page("other", 1) is None
+
+def test_get_page_by_fetch_time(archive):
+    """Test that the latest fetch is returned unless an earlier time is given."""
+    archive.add_page("test", 1, search_page_sample, fetched_at=100.0)
+    archive.add_page("test", 1, search_page_state_sample, fetched_at=200.0)
+
+    assert archive.get_page("test", 1) == search_page_state_sample
+    assert archive.get_page("test", 1, before=150.0) == search_page_sample
+    assert archive.get_page("test", 1, before=50.0) is None
+
+def test_iter_pages(archive):
+    """Test streaming the latest fetch of every page of a query in page order."""
+    archive.add_page("test", 2, search_page_sample, fetched_at=100.0)
+    archive.add_page("test", 1, search_page_sample, fetched_at=100.0)
+    archive.add_page("test", 1, search_page_state_sample, fetched_at=200.0)
+    archive.add_page("other", 1, search_page_sample, fetched_at=100.0)
+
+    assert list(archive.iter_pages("test")) == [
+        (1, 200.0, search_page_state_sample),
+        (2, 100.0, search_page_sample),
+    ]
+    assert [page[:2] for page in archive.iter_pages("test", before=150.0)] == [(1, 100.0), (2, 100.0)]
+    assert archive.get_queries() == [("other", 1, 100.0), ("test", 2, 200.0)]
+
+def test_unknown_codec(tmp_path):
+    """Test that unknown codecs are rejected."""
+    with pytest.raises(ValueError):
+        PageArchive(str(tmp_path / "archive.db"), codec="brotli")
+
+def test_zstd_dictionary_round_trip(tmp_path):
+    """Test that pages compressed with a trained dictionary read back intact."""
+    pytest.importorskip("zstandard")
+    archive = PageArchive(str(tmp_path / "archive.db"), codec="zstd")
+    pages = {page_number: search_page_sample.replace("Dune", f"Dune {page_number}")
+             for page_number in range(1, 121)}
+    for page_number in range(1, 101):
+        archive.add_page("test", page_number, pages[page_number])
+
+    dictionary_id = archive.build_dictionary()
+    for page_number in range(101, 121):
+        archive.add_page("test", page_number, pages[page_number])
+
+    assert dictionary_id is not None
+    assert [html for _, _, html in archive.iter_pages("test")] == list(pages.values())
+    assert PageArchive(str(tmp_path / "archive.db")).get_page("test", 120) == pages[120]
+
+def test_zstd_dictionary_trained_after(tmp_path):
+    """Test that a dictionary is trained once train_after pages are archived."""
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "archive.db")
+    archive = PageArchive(path, codec="zstd", train_after=100)
+    for page_number in range(1, 101):
+        assert archive.train_after == 100
+        archive.add_page("test", page_number, search_page_sample.replace("Dune", f"Dune {page_number}"))
+
+    assert archive.train_after is None
+    assert PageArchive(path, codec="zstd", train_after=100).train_after is None
+    archive.add_page("test", 101, search_page_state_sample)
+    assert archive.get_page("test", 101) == search_page_state_sample
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT dictionary_id FROM archived_pages WHERE page_number = 101;").fetchone() == (1,)
+    conn.close()
+    assert PageArchive(path, codec="zlib", train_after=100).train_after is None
@@ -0,0 +1,43 @@
+"""test_authors.py - Unit tests for author name canonicalization.
+
+Validates the canonical "Last, First" form produced for the author text
+found on search result cards and in embedded search state.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+import pytest
+from src import canonical_author
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Tolkien, J. R. R.", "Tolkien, J.R.R."),
+    ("Tolkien, J.R.R.", "Tolkien, J.R.R."),
+    ("Le Guin, Ursula K.", "LeGuin, Ursula K."),
+    ("Austen, Jane", "Austen, Jane"),
+    ("Dumas, Alexandre, 1802-1870", "Dumas, Alexandre, 1802-1870"),
+])
+def test_canonical_author(raw, expected):
+    """Test conversion of raw author text into canonical form.
+    
+    Args:
+        raw: Author text as found on a result card.
+        expected: Canonical author name.
+    """
+    assert canonical_author(raw) == expected
+
+def test_canonical_author_invalid():
+    """Test that text without a "Last, First" separator has no canonical form."""
+    assert canonical_author("Anonymous") is None
+    assert canonical_author("") is None
+    assert canonical_author(None) is None
+
+def test_canonical_author_memoized():
+    """Test that repeated raw strings are served from the memo."""
+    canonical_author.cache_clear()
+    canonical_author("Tolkien, J. R. R.")
+    canonical_author("Tolkien, J. R. R.")
+
+    info = canonical_author.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
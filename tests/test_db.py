@@ -9,8 +9,10 @@ __author__ = "Abiola Raji"
 __version__ = "1.0"
 __date__ = "2025-09-03"
 
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
 import pytest
-from src import LibraryDB, Book
+from src import LibraryDB, Book, ParseCache, ResponseCache
 from .sample import library_items_sample
 
 def test_book(book):
@@ -82,6 +84,42 @@ def test_add_library_item(db, book):
 
     assert db.get_all_library_items() == [("The Hobbit", "Tolkien, J.R.R.", "BOOK", 1937, 4.25, 2150000, None, "/catalog/12345")]
 
+def test_add_page(db):
+    """Test storing a results page together with its checkpoint.
+    
+    Args:
+        db: Empty database fixture.
+    """
+    books = [Book(title=item[0], author=item[1], format=item[2], pub_year=item[3],
+                  rating=item[4], num_ratings=item[5], link=item[7])
+             for item in library_items_sample[:7]]
+
+    assert db.get_scrape_progress("test") == (None, set())
+
+    db.add_page("test", 1, 45, books[:5])
+    db.add_page("test", 3, 45, books[5:])
+
+    assert db.get_item_count() == 7
+    assert db.get_scrape_progress("test") == (45, {1, 3})
+    assert db.get_scrape_progress("other") == (None, set())
+
+def test_create_table_without_reset(db, book):
+    """Test that create_table keeps stored data when reset is disabled.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    db.add_page("test", 1, 1, [book])
+
+    db.create_table(reset=False)
+    assert db.get_item_count() == 1
+    assert db.get_scrape_progress("test") == (1, {1})
+
+    db.create_table()
+    assert db.get_item_count() == 0
+    assert db.get_scrape_progress("test") == (None, set())
+
 def test_get_frequent_authors(populated_db):
     """Test retrieval of most frequent authors statistics.
     
@@ -237,10 +275,14 @@ def test_delete_table(db):
         db.add_library_item(book)
 
     assert db.get_item_count() == 3
+    ParseCache()
+    ResponseCache()
     
     db.delete_table()
     
     assert db.get_item_count() == None
+    with sqlite3.connect('library.db') as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';").fetchall() == []
 
 def test_empty_table_operations(db):
     """Test database operations on empty table handle gracefully.
@@ -257,4 +299,243 @@ def test_empty_table_operations(db):
     assert db.get_top_books_weighted() == []
     assert db.get_top_authors_unweighted() == []
     assert db.get_top_authors_weighted() == []
-    assert db.get_ratings_per_num_ratings() == []
\ No newline at end of file
+    assert db.get_ratings_per_num_ratings() == []
+
+def test_author_ids(db, book):
+    """Test that authors get stable integer IDs across table resets.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    assert db.get_author_id("Tolkien, J.R.R.") is None
+
+    db.add_library_item(book)
+    db.add_page("test", 1, 2, [book, Book(title="Emma", author="Austen, Jane")])
+    author_id = db.get_author_id("Tolkien, J.R.R.")
+
+    assert isinstance(author_id, int)
+    assert db.get_author_id("Austen, Jane") not in (None, author_id)
+
+    db.create_table()
+    db.add_library_item(Book(title="Emma", author="Austen, Jane"))
+    db.add_library_item(book)
+    assert db.get_author_id("Tolkien, J.R.R.") == author_id
+    assert db.get_frequent_authors() == [("Austen, Jane", 1), ("Tolkien, J.R.R.", 1)]
+
+def test_get_scrape_queries(db, book):
+    """Test listing the queries that have stored checkpoints.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    assert db.get_scrape_queries() == []
+
+    db.add_page("test [f_FORMAT=BK]", 1, 1, [book])
+    db.add_page("test", 2, 40, [book])
+    db.add_page("test", 1, 40, [book])
+    assert db.get_scrape_queries() == ["test", "test [f_FORMAT=BK]"]
+
+def test_scrape_partitions(db):
+    """Test recording the partition plan of a search and marking partitions done.
+    
+    Args:
+        db: Empty database fixture.
+    """
+    assert db.get_scrape_partitions("test", "year") == []
+
+    db.add_scrape_partitions("test", "year", [
+        ("test [a=1500&b=1999]", {"a": 1500, "b": 1999}),
+        ("test [a=2000&b=2026]", {"a": 2000, "b": 2026}),
+    ])
+    db.set_scrape_partition_done("test", "test [a=2000&b=2026]")
+    db.add_scrape_partitions("test", "year", [("test [a=2000&b=2026]", {"a": 2000, "b": 2026})])
+
+    assert db.get_scrape_partitions("test", "year") == [
+        ("test [a=1500&b=1999]", {"a": 1500, "b": 1999}, False),
+        ("test [a=2000&b=2026]", {"a": 2000, "b": 2026}, True),
+    ]
+    assert db.get_scrape_partitions("test", "format") == []
+
+    db.create_table()
+    assert db.get_scrape_partitions("test", "year") == []
+
+def test_items_tagged_by_query(db, book):
+    """Test that stored pages tag their items with the query.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    db.add_page("hobbits", 1, 1, [book])
+    db.add_page("novels [f_FORMAT=BK]", 1, 2, [book, Book(title="Emma", link="/catalog/2")], "novels")
+
+    assert db.get_item_count("novels") == 2
+    assert db.get_item_count("novels [f_FORMAT=BK]") == 0
+    assert [item[:2] for item in db.get_items_by_query()] == [
+        ("hobbits", "The Hobbit"), ("novels", "The Hobbit"), ("novels", "Emma")]
+
+def test_items_stored_once_per_link(db, book):
+    """Test that an item found again only gains a query membership.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    db.add_page("hobbits", 1, 1, [book])
+    db.add_page("hobbits", 2, 1, [book])
+    db.add_page("tolkien", 1, 2, [book, Book(title="Untitled")])
+    db.add_page("fantasy", 1, 1, [Book(title="The Hobbit (copy)", link=book.link)])
+
+    assert db.get_item_count() == 2
+    assert db.get_all_library_items()[0][:2] == ("The Hobbit (copy)", "Tolkien, J.R.R.")
+    assert db.get_item_count("hobbits") == 1
+    assert db.get_item_count("tolkien") == 1
+    assert db.get_item_count("fantasy") == 1
+
+def test_items_refreshed_when_found_again(db, book):
+    """Test that a stored item takes the new record's fields but keeps those it lacks.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    db.add_page("ratings", 1, 1, [Book(rating=4.0, link=book.link)])
+    db.add_page("hobbits", 1, 1, [book])
+
+    assert db.get_item_count() == 1
+    assert db.get_all_library_items()[0][:6] == (
+        "The Hobbit", "Tolkien, J.R.R.", "BOOK", 1937, 4.25, 2150000)
+    assert db.get_frequent_authors() == [("Tolkien, J.R.R.", 1)]
+
+    db.add_page("ratings", 2, 1, [Book(rating=4.5, num_ratings=2160000, link=book.link)])
+
+    assert db.get_all_library_items()[0][:6] == (
+        "The Hobbit", "Tolkien, J.R.R.", "BOOK", 1937, 4.5, 2160000)
+
+def test_item_details(db, book):
+    """Test storing enriched detail fields and finding items to enrich.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    db.add_page("test", 1, 2, [book, Book(title="Emma", link="/catalog/2")])
+
+    assert db.get_item_details(book.link) is None
+    assert db.get_links_to_enrich() == [book.link, "/catalog/2"]
+
+    details = {"isbn": "9780261102217", "page_count": 310, "subjects": ["Dragons"],
+               "series": None, "language": "English"}
+    db.add_item_details({book.link: details}, enriched_at=1000.0)
+    db.add_item_details({"/catalog/2": dict.fromkeys(details)})
+
+    assert db.get_item_details(book.link) == {**details, "enriched_at": 1000.0}
+    assert db.get_item_details("/catalog/2")["subjects"] is None
+    assert db.get_links_to_enrich() == []
+    assert db.get_links_to_enrich(max_age=3600) == [book.link]
+
+    db.create_table()
+    assert db.get_item_details(book.link) is not None
+
+def test_response_cache(db):
+    """Test storing, reading, expiring and evicting cached responses.
+    
+    Args:
+        db: Empty database fixture, whose cleanup drops the cache table.
+    """
+    cache = ResponseCache(max_entries=2)
+    cache.clear()
+
+    assert cache.get("/a") is None
+
+    cache.put("/a", "<html>a</html>")
+    cache.put("/b", "<html>b</html>")
+    assert cache.get("/a") == "<html>a</html>"
+    assert cache.get("/a", max_age=3600) == "<html>a</html>"
+    assert cache.get("/a", max_age=-1) is None
+
+    cache.put("/c", "<html>c</html>")
+    assert cache.get("/a") is None
+    assert cache.get("/c") == "<html>c</html>"
+    assert (cache.hits, cache.misses) == (3, 3)
+
+    cache.clear()
+    assert cache.get("/c") is None
+
+def test_response_cache_ttl(db):
+    """Test that cached responses expire after the cache's own ttl.
+    
+    Args:
+        db: Empty database fixture, whose cleanup drops the cache table.
+    """
+    cache = ResponseCache(ttl=-1)
+    cache.put("/a", "<html>a</html>")
+
+    assert cache.get("/a") is None
+    assert cache.get("/a", max_age=3600) == "<html>a</html>"
+    assert ResponseCache(ttl=None).get("/a") == "<html>a</html>"
+
+def test_response_cache_counters_threadsafe(db):
+    """Test that hits and misses counted from several threads are not lost.
+    
+    Args:
+        db: Empty database fixture, whose cleanup drops the cache table.
+    """
+    cache = ResponseCache()
+    cache.put("/a", "<html>a</html>")
+
+    def lookup(number):
+        return cache.get("/a" if number % 2 else "/b")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lookup, range(200)))
+
+    assert (cache.hits, cache.misses) == (100, 100)
+
+def test_parse_cache(db):
+    """Test storing, reading and evicting cached page parses.
+    
+    Args:
+        db: Empty database fixture, whose cleanup drops the cache table.
+    """
+    cache = ParseCache(max_entries=2)
+    cache.clear()
+    records = [("The Hobbit", "Tolkien, J.R.R.", "BOOK", 1937, 4.25, 2150000, "/catalog/12345")]
+
+    assert cache.get("page-a") is None
+
+    cache.put("page-a", 20, records)
+    assert cache.get("page-a") == (20, records)
+
+    cache.put("page-b", 20, [])
+    cache.get("page-a")
+    cache.put("page-c", 20, records)
+
+    assert cache.get("page-b") is None
+    assert cache.get("page-a") == (20, records)
+    assert cache.get("page-c") == (20, records)
+    assert (cache.hits, cache.misses) == (4, 2)
+
+    cache.clear()
+    assert cache.get("page-a") is None
+
+def test_parse_cache_evicts_in_batches(db):
+    """Test that a full cache trims a batch of its oldest entries at once.
+    
+    Args:
+        db: Empty database fixture, whose cleanup drops the cache table.
+    """
+    cache = ParseCache(max_entries=20)
+    for number in range(20):
+        cache.put(f"page-{number}", 20, [])
+
+    assert ParseCache(max_entries=20)._entries == 20
+
+    cache.put("page-20", 20, [])
+
+    assert ParseCache()._entries == 18
+    assert cache.get("page-2") is None
+    assert cache.get("page-3") == (20, [])
+    assert cache.get("page-20") == (20, [])
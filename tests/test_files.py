@@ -12,7 +12,7 @@ __date__ = "2025-09-03"
 import pytest
 import os
 from unittest.mock import mock_open, patch
-from src import LibraryDB, write_to_file, export_as_csv
+from src import LibraryDB, Book, write_to_file, export_as_csv, export_by_query
 from .sample import library_items_sample
 
 def test_write_to_file(populated_db):
@@ -124,4 +124,23 @@ def test_export_as_csv_exception_handling(populated_db):
             # If we get here, exception was handled
             assert True
         except Exception:
-            pytest.fail("export_as_csv should handle exceptions internally")
\ No newline at end of file
+            pytest.fail("export_as_csv should handle exceptions internally")
+
+def test_export_by_query(db, book):
+    """Test exporting library data tagged with each item's query.
+    
+    Args:
+        db: Empty database fixture.
+        book: Book instance fixture.
+    """
+    db.add_page("hobbits", 1, 1, [book])
+    db.add_page("novels", 1, 1, [Book(title="Emma", author="Austen, Jane", link="/catalog/2")])
+
+    with patch("builtins.open", mock_open()) as mocked_file:
+        with patch("csv.writer") as mocked_writer:
+            export_by_query(db)
+
+            mocked_file.assert_called_once_with("results/library_items_by_query.csv", "w", newline='')
+            mocked_writer.return_value.writerow.assert_called_once()
+            rows = mocked_writer.return_value.writerows.call_args[0][0]
+            assert [row[:2] for row in rows] == [("hobbits", "The Hobbit"), ("novels", "Emma")]
@@ -0,0 +1,183 @@
+"""test_parser.py - Unit tests for search result page parsing.
+
+Tests the lxml card extractor against known page content, the recorded
+benchmark corpus and the reference BeautifulSoup extractor, including
+cards with missing fields and pages without results.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+import glob
+import json
+import os
+import pytest
+from src import parser
+from src import parse_search_page, parse_search_page_soup, parse_search_state, parse_search_pages, page_fingerprint, parse_item_details, BOOK_FIELDS, DETAIL_FIELDS
+from .sample import search_page_sample, search_page_sample_items, search_page_state_sample, item_page_sample, item_page_sample_details, item_page_state_sample
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'corpus')
+with open(os.path.join(CORPUS_DIR, 'expected.json'), encoding='utf-8') as file:
+    corpus_expected = json.load(file)
+
+def book_fields(book):
+    """Convert a Book into a comparable tuple of its fields.
+    
+    Args:
+        book: Book instance to convert.
+    
+    Returns:
+        tuple: (title, author, format, pub_year, rating, num_ratings, link).
+    """
+    return (book.title, book.author, book.format, book.pub_year,
+            book.rating, book.num_ratings, book.link)
+
+def test_parse_search_page():
+    """Test extraction of result count and card fields with lxml."""
+    target_item_count, books = parse_search_page(search_page_sample)
+
+    assert target_item_count == 1234
+    assert [book_fields(book) for book in books] == search_page_sample_items
+
+def test_parse_search_page_matches_soup():
+    """Test that the lxml extractor agrees with the BeautifulSoup extractor."""
+    target_item_count, books = parse_search_page(search_page_sample)
+    soup_item_count, soup_books = parse_search_page_soup(search_page_sample)
+
+    assert target_item_count == soup_item_count
+    assert [book_fields(book) for book in books] == [book_fields(book) for book in soup_books]
+
+def test_parse_empty_page():
+    """Test that pages without results produce no count and no cards."""
+    assert parse_search_page("<html><body><p>No results</p></body></html>") == (0, [])
+    assert parse_search_page("") == (0, [])
+
+def test_parse_search_page_partial_matches_full():
+    """Test that parsing only the result list gives the same records as the full page."""
+    target_item_count, books = parse_search_page(search_page_sample)
+    full_item_count, full_books = parse_search_page(search_page_sample, partial=False)
+
+    assert target_item_count == full_item_count
+    assert [book_fields(book) for book in books] == [book_fields(book) for book in full_books]
+
+def test_parse_search_page_partial_ignores_decoys():
+    """Test that class names mentioned outside class attributes do not move the slice."""
+    page = search_page_sample.replace("</head>", """<style>.cp-search-result-item-content { margin: 0 }
+.cp-pagination-label { color: red }</style>
+<script>var cards = "div.cp-search-result-item-content"; // 9 to 9 of 9 results</script></head>""")
+    page = page.replace('<footer class="cp-footer">', '<div class="cp-search-result-item-content-footer"></div><footer class="cp-footer">')
+
+    target_item_count, books = parse_search_page(page)
+
+    assert target_item_count == 1234
+    assert [book_fields(book) for book in books] == [
+        book_fields(book) for book in parse_search_page(page, partial=False)[1]]
+    assert len(books) == 4
+
+def test_parse_search_state():
+    """Test extraction from the embedded JSON state matches the result cards."""
+    assert parse_search_state(search_page_sample) is None
+
+    target_item_count, books = parse_search_state(search_page_state_sample)
+
+    assert target_item_count == 1234
+    assert [book_fields(book) for book in books] == search_page_sample_items
+
+def test_parse_search_page_falls_back_to_cards():
+    """Test that malformed embedded state falls back to card extraction."""
+    broken_page = search_page_sample.replace(
+        "</head>", '<script type="application/json">{"search": {"catalogSearch": </script></head>')
+
+    target_item_count, books = parse_search_page(broken_page)
+
+    assert target_item_count == 1234
+    assert [book_fields(book) for book in books] == search_page_sample_items
+
+def test_parse_item_details():
+    """Test extraction of the labelled fields of an item detail page."""
+    assert parse_item_details(item_page_sample, "/v2/record/S114C1369884095") == item_page_sample_details
+    assert parse_item_details(None) == dict.fromkeys(DETAIL_FIELDS)
+    assert parse_item_details(search_page_sample) == dict.fromkeys(DETAIL_FIELDS)
+
+def test_parse_item_details_state():
+    """Test that the page's own bib is read from the embedded state and gaps filled from markup."""
+    details = parse_item_details(item_page_state_sample, "/v2/record/S114C1369884095")
+
+    assert details == item_page_sample_details
+    assert parse_item_details(item_page_state_sample, "/v2/record/S114C2231570")["isbn"] == "9780441013593"
+    assert parse_item_details(item_page_state_sample)["isbn"] is None
+
+def test_parse_search_pages():
+    """Test batch parsing into plain field tuples for worker processes."""
+    results = parse_search_pages([search_page_sample, None])
+
+    assert results == [(1234, search_page_sample_items), (0, [])]
+
+def test_page_fingerprint():
+    """Test that fingerprints ignore page chrome but track result changes."""
+    fingerprint = page_fingerprint(search_page_sample)
+
+    assert page_fingerprint(search_page_sample.replace("<title>Search", "<title>Results")) == fingerprint
+    assert page_fingerprint(search_page_sample.replace("Dune", "Dune Messiah")) != fingerprint
+    assert page_fingerprint(search_page_state_sample) != fingerprint
+    assert page_fingerprint(search_page_sample, ('title',)) != fingerprint
+
+def test_page_fingerprint_parser_version(monkeypatch):
+    """Test that a new parser version invalidates the fingerprints of unchanged pages."""
+    fingerprint = page_fingerprint(search_page_sample)
+    monkeypatch.setattr(parser, "PARSER_VERSION", parser.PARSER_VERSION + 1)
+
+    assert page_fingerprint(search_page_sample) != fingerprint
+
+@pytest.mark.parametrize("page", [search_page_sample, search_page_state_sample])
+@pytest.mark.parametrize("fields", [
+    ('title', 'author', 'link'),
+    ('rating',),
+    ('num_ratings', 'pub_year'),
+    BOOK_FIELDS,
+])
+def test_parse_search_page_fields(page, fields):
+    """Test that a field projection extracts only the requested fields.
+    
+    Args:
+        page: Search page with or without embedded state.
+        fields: Book attributes to extract.
+    """
+    target_item_count, books = parse_search_page(page, fields=fields)
+
+    expected = [tuple(value if name in fields else None for name, value in zip(BOOK_FIELDS, item))
+                for item in search_page_sample_items]
+    assert target_item_count == 1234
+    assert [book_fields(book) for book in books] == expected
+
+def test_parse_search_page_unknown_field():
+    """Test that projections naming unknown fields are rejected."""
+    with pytest.raises(ValueError):
+        parse_search_page(search_page_sample, fields=('title', 'isbn'))
+
+@pytest.mark.parametrize("page_name", sorted(corpus_expected))
+@pytest.mark.parametrize("parse", [
+    parse_search_page,
+    lambda page: parse_search_page(page, use_state=False),
+    lambda page: parse_search_page(page, partial=False, use_state=False),
+    parse_search_page_soup,
+], ids=["json-state", "lxml", "lxml-full", "beautifulsoup"])
+def test_parse_corpus(page_name, parse):
+    """Test every extractor against the recorded output for the benchmark corpus.
+    
+    Args:
+        page_name: File name of a corpus page.
+        parse: Extractor under test.
+    """
+    with open(os.path.join(CORPUS_DIR, page_name), encoding='utf-8') as file:
+        target_item_count, books = parse(file.read())
+
+    assert target_item_count == corpus_expected[page_name]["target_item_count"]
+    assert [list(book_fields(book)) for book in books] == corpus_expected[page_name]["items"]
+
+def test_corpus_has_expected_output():
+    """Test that every corpus page has recorded expected output."""
+    pages = {os.path.basename(path) for path in glob.glob(os.path.join(CORPUS_DIR, '*.html'))}
+
+    assert pages == set(corpus_expected)
@@ -0,0 +1,637 @@
+"""test_scraper.py - Unit tests for page fetching and crawl scheduling.
+
+Tests the page iterators, retry and rate control, and the streaming
+search API against a fake catalog, without touching the network.
+"""
+
+__author__ = "Abiola Raji"
+__version__ = "1.0"
+__date__ = "2025-09-03"
+
+from concurrent.futures import ProcessPoolExecutor
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+import pytest
+import requests
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
+from src import Book, PageArchive, ParseCache, ResponseCache, enrich_library_items, reparse_archive, iter_library_data, scrape_library_data, scrape_queries, is_scrape_incomplete, has_scrape_progress, unfinished_queries
+from src import scraper
+from .sample import search_page_sample, item_page_sample, item_page_sample_details
+
+def search_page(page_number: int, total: int) -> str:
+    """Build a search results page of a fake catalog.
+    
+    Args:
+        page_number (int): Results page number, used to make links unique.
+        total (int): Result count shown in the pagination label.
+    
+    Returns:
+        str: search_page_sample with four cards whose links are unique
+            to the page.
+    """
+    return (search_page_sample
+            .replace("1 to 20 of 1,234 results", f"1 to 20 of {total} results")
+            .replace("/v2/record/S114C", f"/v2/record/S114P{page_number}C"))
+
+class FakeCatalog:
+    """Stand-in for _fetch_html serving search_page results.
+    
+    Records the page numbers requested and the largest number of requests
+    in flight at once.
+    """
+
+    def __init__(self, total: int, delay=0.0):
+        """Initialize a catalog with a result count and response delay.
+        
+        Args:
+            total (int): Result count of every search.
+            delay (callable or float): Seconds each response takes, or a
+                function of the page number returning them. Default 0.0.
+        """
+        self.total = total
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str) -> str:
+        """Serve one search results page.
+        
+        Args:
+            url (str): Search URL with a page parameter.
+        
+        Returns:
+            str: HTML of the requested page.
+        """
+        page_number = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        with self._lock:
+            self.requests.append(page_number)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay(page_number) if callable(self.delay) else self.delay)
+            return search_page(page_number, self.total)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def test_iter_library_data_concurrent_order(monkeypatch):
+    """Test that concurrent downloads are yielded in page order and bounded."""
+    catalog = FakeCatalog(200, delay=lambda page_number: 0.05 / page_number)
+    monkeypatch.setattr(scraper, "_fetch_html", catalog)
+
+    pages = [page_number for page_number, _, _ in iter_library_data("test", concurrency=4)]
+
+    assert pages == list(range(1, 11))
+    assert sorted(catalog.requests) == list(range(1, 11))
+    assert 1 < catalog.peak <= 4
+
+class FakeDriver:
+    """Stand-in for a Chrome WebDriver that records whether it was quit."""
+
+    def __init__(self):
+        """Initialize a running driver."""
+        self.quit_called = False
+
+    def quit(self):
+        """Mark the driver as quit."""
+        self.quit_called = True
+
+def test_driver_pool_reuses_drivers(monkeypatch):
+    """Test that drivers start lazily up to the pool size and are reused."""
+    started = []
+
+    def get_driver(**options):
+        started.append(FakeDriver())
+        return started[-1]
+
+    monkeypatch.setattr(scraper, "MAX_DRIVERS", 4)
+    monkeypatch.setattr(scraper, "_get_driver", get_driver)
+    pool = scraper._DriverPool(2)
+
+    first = pool.acquire()
+    second = pool.acquire()
+    assert started == [first, second]
+
+    pool.release(first)
+    assert pool.acquire() is first
+    assert len(started) == 2
+
+    pool.close()
+    assert all(driver.quit_called for driver in started)
+
+def test_driver_pool_size_capped(monkeypatch):
+    """Test that the pool never holds more than MAX_DRIVERS drivers."""
+    monkeypatch.setattr(scraper, "MAX_DRIVERS", 2)
+
+    assert scraper._DriverPool(8).size == 2
+    assert scraper._DriverPool(0).size == 1
+
+def test_iter_pages_driver_pool_order(monkeypatch):
+    """Test that pages rendered in parallel are yielded in page order."""
+    monkeypatch.setattr(scraper, "MAX_DRIVERS", 4)
+    pool = scraper._DriverPool(3)
+
+    def fetch(url, page_number):
+        time.sleep(0.02 / page_number)
+        return search_page(page_number, 200)
+
+    pages = list(scraper._iter_pages_driver_pool("test", range(1, 11), fetch, pool))
+
+    assert [page_number for page_number, _, _ in pages] == list(range(1, 11))
+    assert all(library_html == search_page(page_number, 200) for page_number, _, library_html in pages)
+
+def collect_pages(pages, timeout: float = 5.0) -> list:
+    """Drain a page iterator in a thread, failing the test if it hangs.
+    
+    Args:
+        pages (iterator): Page iterator to drain.
+        timeout (float): Seconds to wait for it to finish. Default 5.0.
+    
+    Returns:
+        list: Pages yielded by the iterator.
+    """
+    collected = []
+    thread = threading.Thread(target=lambda: collected.extend(pages), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "page iterator did not finish"
+    return collected
+
+def test_iter_pages_driver_pool_driver_fails_late(monkeypatch):
+    """Test that a page is not lost when its Chrome fails after the other workers left."""
+    monkeypatch.setattr(scraper, "MAX_DRIVERS", 4)
+    pool = scraper._DriverPool(2)
+
+    def fetch(url, page_number):
+        if page_number == 2:
+            time.sleep(0.1)
+            raise SessionNotCreatedException("chrome not found")
+        return search_page(page_number, 40)
+
+    pages = collect_pages(scraper._iter_pages_driver_pool("test", [1, 2], fetch, pool))
+
+    assert [(page_number, library_html is not None) for page_number, _, library_html in pages] == [
+        (1, True), (2, False)]
+
+def test_iter_pages_driver_pool_driver_fails_early(monkeypatch):
+    """Test that a worker that cannot start Chrome hands its page to the others."""
+    monkeypatch.setattr(scraper, "MAX_DRIVERS", 4)
+    pool = scraper._DriverPool(2)
+    failed = []
+
+    def fetch(url, page_number):
+        if page_number == 1 and not failed:
+            failed.append(page_number)
+            raise SessionNotCreatedException("chrome not found")
+        time.sleep(0.01)
+        return search_page(page_number, 200)
+
+    pages = collect_pages(scraper._iter_pages_driver_pool("test", range(1, 11), fetch, pool))
+
+    assert [page_number for page_number, _, _ in pages] == list(range(1, 11))
+    assert all(library_html is not None for _, _, library_html in pages)
+
+def test_iter_pages_driver_pool_no_drivers(monkeypatch):
+    """Test that the iterator fails when none of the drivers can start."""
+    monkeypatch.setattr(scraper, "MAX_DRIVERS", 4)
+    pool = scraper._DriverPool(2)
+
+    def fetch(url, page_number):
+        raise SessionNotCreatedException("chrome not found")
+
+    with pytest.raises(RuntimeError):
+        list(scraper._iter_pages_driver_pool("test", range(1, 5), fetch, pool))
+
+def http_error(status: int) -> requests.HTTPError:
+    """Build the error raise_for_status raises for a response status.
+    
+    Args:
+        status (int): HTTP status code.
+    
+    Returns:
+        requests.HTTPError: Error carrying a response with the status.
+    """
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+def test_retry_backoff_bounds():
+    """Test that jittered delays stay between zero and the capped backoff."""
+    policy = scraper.RetryPolicy(attempts=6, base_delay=0.5, max_delay=3.0)
+
+    for attempt in range(6):
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= min(3.0, 0.5 * 2 ** attempt) for delay in delays)
+        assert len(set(delays)) > 1
+
+def test_retry_call(monkeypatch):
+    """Test that transient failures are retried until the call succeeds."""
+    sleeps = []
+    monkeypatch.setattr(scraper.time, "sleep", sleeps.append)
+    outcomes = [requests.ConnectionError("reset"), http_error(503), "page"]
+
+    def fetch():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert scraper.RetryPolicy(attempts=3, base_delay=1.0).call(fetch) == "page"
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+
+def test_retry_gives_up(monkeypatch):
+    """Test that the last error is raised once every attempt has failed."""
+    sleeps = []
+    calls = []
+    monkeypatch.setattr(scraper.time, "sleep", sleeps.append)
+
+    def fetch():
+        calls.append(1)
+        raise http_error(429)
+
+    with pytest.raises(requests.HTTPError):
+        scraper.RetryPolicy(attempts=4).call(fetch)
+    assert len(calls) == 4
+    assert len(sleeps) == 3
+
+def test_retry_client_error(monkeypatch):
+    """Test that client errors other than 429 are not retried."""
+    calls = []
+    monkeypatch.setattr(scraper.time, "sleep", lambda delay: None)
+
+    def fetch():
+        calls.append(1)
+        raise http_error(404)
+
+    with pytest.raises(requests.HTTPError):
+        scraper.RetryPolicy(attempts=4).call(fetch)
+    assert len(calls) == 1
+
+def test_iter_library_data_dead_letters(monkeypatch):
+    """Test that failing pages are dead-lettered and only missing pages are refetched."""
+    catalog = FakeCatalog(200)
+    empty_once = []
+
+    def fetch(url):
+        library_html = catalog(url)
+        page_number = catalog.requests[-1]
+        if page_number == 3:
+            raise requests.ConnectionError("reset")
+        if page_number == 4 and not empty_once:
+            empty_once.append(page_number)
+            return search_page_sample.split('<li class="cp-search-result-item">')[0]
+        return library_html
+
+    monkeypatch.setattr(scraper.time, "sleep", lambda delay: None)
+    monkeypatch.setattr(scraper, "_fetch_html", fetch)
+    dead_letters = []
+
+    pages = [page_number for page_number, _, _ in iter_library_data(
+        "test", retry=scraper.RetryPolicy(attempts=2), dead_letters=dead_letters)]
+
+    assert pages == [1, 2, 5, 6, 7, 8, 9, 10, 4]
+    assert dead_letters == [3]
+    assert catalog.requests.count(3) == 2
+    assert catalog.requests.count(4) == 2
+    assert all(catalog.requests.count(n) == 1 for n in (1, 2, 5, 6, 7, 8, 9, 10))
+
+def test_rate_controller_increase():
+    """Test that fast responses raise the limit up to the concurrency ceiling."""
+    rate = scraper.RateController(max_concurrency=4)
+    assert int(rate.limit) == 2
+
+    for _ in range(50):
+        rate.acquire()
+        rate.release(0.01)
+
+    assert rate.limit == 4.0
+    assert rate.gap == 0.0
+
+def test_rate_controller_decrease():
+    """Test that throttling halves the limit once per round trip and widens the gap."""
+    rate = scraper.RateController(max_concurrency=8)
+    rate.limit = 8.0
+
+    rate.acquire()
+    rate.release(1.0, throttled=True)
+    assert rate.limit == 4.0
+    assert rate.gap == 0.25
+
+    rate.acquire()
+    rate.release(1.0, throttled=True)
+    assert rate.limit == 4.0, "a second failure in the same round trip should not count"
+
+def test_rate_controller_slow_response():
+    """Test that slow responses halve the limit without widening the gap."""
+    rate = scraper.RateController(max_concurrency=8, latency_target=0.5)
+    rate.limit = 8.0
+
+    rate.acquire()
+    rate.release(2.0)
+
+    assert rate.limit == 4.0
+    assert rate.gap == 0.0
+
+def test_rate_controller_call_releases(monkeypatch):
+    """Test that call frees its slot whatever the request raises."""
+    monkeypatch.setattr(scraper.time, "sleep", lambda delay: None)
+    rate = scraper.RateController(max_concurrency=2)
+
+    def fail(error):
+        raise error
+
+    for error in (http_error(429), ValueError("bad page"), SystemExit(1)):
+        with pytest.raises(type(error)):
+            rate.call(fail, error)
+        assert rate._in_flight == 0
+
+    assert rate.call(str.upper, "page") == "PAGE"
+    assert rate._in_flight == 0
+
+def test_browser_fallback_retried(monkeypatch):
+    """Test that the Chrome fallback goes through the retry policy and never aborts the query."""
+    catalog = FakeCatalog(40)
+    renders = []
+
+    def fetch(url):
+        library_html = catalog(url)
+        if catalog.requests[-1] == 2:
+            return search_page_sample.split('<li class="cp-search-result-item">')[0]
+        return library_html
+
+    def render(url, page_number):
+        renders.append(page_number)
+        raise WebDriverException("chrome crashed")
+
+    monkeypatch.setattr(scraper.time, "sleep", lambda delay: None)
+    monkeypatch.setattr(scraper, "_fetch_html", fetch)
+    pool = scraper._DriverPool(1)
+    monkeypatch.setattr(pool, "render", render)
+    rate = scraper.RateController()
+
+    pages = [page_number for page_number, _, _ in iter_library_data(
+        "test", browser_fallback=True, retry=scraper.RetryPolicy(attempts=2),
+        rate=rate, driver_pool=pool)]
+
+    assert pages == [1]
+    assert renders == [2] * 2 * scraper.MAX_SCRAPE_PASSES
+    assert rate._in_flight == 0
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_iter_library_data_bounded(monkeypatch, concurrency):
+    """Test that pages stream in order with a bounded number fetched ahead of the consumer."""
+    catalog = FakeCatalog(2000)
+    monkeypatch.setattr(scraper, "_fetch_html", catalog)
+    pages = []
+    ahead = []
+
+    for page_number, target_item_count, books in iter_library_data("test", concurrency=concurrency):
+        pages.append(page_number)
+        ahead.append(len(catalog.requests) - len(pages))
+        assert target_item_count == 2000
+        assert [book.link for book in books][0] == f"/v2/record/S114P{page_number}C1369884095"
+        time.sleep(0.001)
+
+    assert pages == list(range(1, 101))
+    assert max(ahead) <= max(concurrency * 2, 1) + 1
+
+def test_partitioned_scrape_resumes_unstarted_partitions(db, monkeypatch):
+    """Test that a partition that never stored a page keeps the search unfinished."""
+    catalog = FakeCatalog(40)
+    failing = ["f_FORMAT=EBOOK&"]
+
+    def fetch(url):
+        if any(code in url for code in failing):
+            raise requests.ConnectionError("reset")
+        return catalog(url)
+
+    monkeypatch.setattr(scraper.time, "sleep", lambda delay: None)
+    monkeypatch.setattr(scraper, "_fetch_html", fetch)
+    options = dict(partition_by="format", concurrency=3, retry=scraper.RetryPolicy(attempts=1))
+
+    scrape_library_data(db, "test", **options)
+
+    assert is_scrape_incomplete(db, "test", "format")
+    assert [key for key, _, done in db.get_scrape_partitions("test", "format") if not done] == [
+        "test [f_FORMAT=EBOOK]"]
+
+    failing.clear()
+    fetched = len(catalog.requests)
+    scrape_library_data(db, "test", **options)
+
+    assert not is_scrape_incomplete(db, "test", "format")
+    # The unfiltered count, then both pages of the unfinished partition
+    assert sorted(catalog.requests[fetched:]) == [1, 1, 2]
+    assert db.get_scrape_progress("test [f_FORMAT=EBOOK]") == (40, {1, 2})
+
+def test_browser_engine_without_chrome(monkeypatch):
+    """Test that Chrome failing to start raises an error rather than exiting."""
+    def chrome(options):
+        raise WebDriverException("chrome not found")
+
+    monkeypatch.setattr(scraper.webdriver, "Chrome", chrome)
+
+    with pytest.raises(SessionNotCreatedException):
+        list(iter_library_data("test", engine="browser"))
+
+def test_partition_without_chrome_stays_unfinished(db, monkeypatch):
+    """Test that a partition whose Chrome cannot start is failed, not marked done."""
+    catalog = FakeCatalog(40)
+    pool = scraper._DriverPool(2)
+
+    def chrome(options):
+        raise WebDriverException("chrome not found")
+
+    def render(url, page_number):
+        if "f_FORMAT=EBOOK&" in url:
+            scraper._get_driver()
+        return catalog(url)
+
+    monkeypatch.setattr(scraper.webdriver, "Chrome", chrome)
+    monkeypatch.setattr(scraper, "_fetch_html", catalog)
+    monkeypatch.setattr(pool, "render", render)
+
+    scrape_library_data(db, "test", partition_by="format", engine="browser", num_drivers=2,
+                        driver_pool=pool)
+
+    assert is_scrape_incomplete(db, "test", "format")
+    assert [key for key, _, done in db.get_scrape_partitions("test", "format") if not done] == [
+        "test [f_FORMAT=EBOOK]"]
+
+def test_interrupted_batch_keeps_progress(db, monkeypatch):
+    """Test that a batch stopped before its last query resumes, and starts over once finished."""
+    catalogs = {"long": FakeCatalog(40), "short": FakeCatalog(4), "unstarted": FakeCatalog(40)}
+    interrupted = ["unstarted"]
+
+    def fetch(url):
+        query = parse_qs(urlparse(url).query)["query"][0]
+        if query in interrupted:
+            raise requests.ConnectionError("reset")
+        return catalogs[query](url)
+
+    monkeypatch.setattr(scraper.time, "sleep", lambda delay: None)
+    monkeypatch.setattr(scraper, "_fetch_html", fetch)
+    options = dict(retry=scraper.RetryPolicy(attempts=1))
+
+    scrape_queries(db, list(catalogs), **options)
+
+    # Neither a finished one-page query nor an unstarted one looks unfinished
+    assert not any(is_scrape_incomplete(db, query) for query in catalogs)
+    assert [query for query in catalogs if has_scrape_progress(db, query)] == ["long", "short"]
+    assert unfinished_queries(db, list(catalogs)) == ["unstarted"]
+
+    interrupted.clear()
+    fetched = {query: len(catalog.requests) for query, catalog in catalogs.items()}
+    scrape_queries(db, list(catalogs), **options)
+
+    assert [len(catalog.requests) - fetched[query] for query, catalog in catalogs.items()] == [0, 0, 2]
+    assert [db.get_item_count(query) for query in catalogs] == [8, 4, 8]
+    assert unfinished_queries(db, list(catalogs)) == []
+
+def year_catalog(year_counts: dict, undated: int = 0, unreadable=(), failures=None):
+    """Build a fetch function counting results by publication-year range.
+    
+    Args:
+        year_counts (dict): Result count of each publication year.
+        undated (int): Results without a year, only in the unfiltered count.
+        unreadable (tuple): (from, to) ranges whose pagination label is missing.
+        failures (dict, optional): Number of times each (from, to) range
+            fails before answering; the count left is updated in place.
+    
+    Returns:
+        callable: Stand-in for _fetch_html.
+    """
+    failures = {} if failures is None else failures
+
+    def fetch(url):
+        params = parse_qs(urlparse(url).query)
+        if "f_PUBLISHED_YEAR_FROM" not in params:
+            return search_page(1, sum(year_counts.values()) + undated)
+        years = (int(params["f_PUBLISHED_YEAR_FROM"][0]), int(params["f_PUBLISHED_YEAR_TO"][0]))
+        if failures.get(years):
+            failures[years] -= 1
+            raise requests.ConnectionError("reset")
+        item_count = sum(count for year, count in year_counts.items() if years[0] <= year <= years[1])
+        if years in unreadable:
+            return search_page(1, item_count).replace("1 to 20 of", "")
+        return search_page(1, item_count) if item_count else "<html><body></body></html>"
+
+    return fetch
+
+def test_year_partitions_report_undated_items(monkeypatch, capsys):
+    """Test that counts are retried and results outside every year range are reported."""
+    failures = {(1500, 1762): 1}
+    monkeypatch.setattr(scraper.time, "sleep", lambda delay: None)
+    monkeypatch.setattr(scraper, "_fetch_html", year_catalog({1990: 30, 2020: 30}, undated=10,
+                                                             failures=failures))
+
+    partitions = scraper._year_partitions("test", 40, scraper.RateController(), total=70,
+                                          last_year=2025)
+
+    assert partitions == [scraper._year_filters(1961, 1993), scraper._year_filters(1994, 2025)]
+    assert failures == {(1500, 1762): 0}
+    assert "hold 60 of its 70 results" in capsys.readouterr().out
+
+def test_year_partitions_keep_unreadable_counts(monkeypatch, capsys):
+    """Test that a range whose count cannot be read is crawled whole instead of dropped."""
+    monkeypatch.setattr(scraper, "_fetch_html", year_catalog({1990: 30, 2020: 30},
+                                                             unreadable=[(1500, 2025)]))
+
+    partitions = scraper._year_partitions("test", 40, scraper.RateController(), total=60,
+                                          last_year=2025)
+
+    assert partitions == [scraper._year_filters(1500, 2025)]
+    output = capsys.readouterr().out
+    assert "Unable to read the result count" in output
+    assert "Warning" not in output
+
+def test_enrich_library_items(db, monkeypatch):
+    """Test that enrichment skips fresh items, reuses cached pages and stores in batches."""
+    links = [f"/v2/record/S114C{number}" for number in range(7)]
+    db.add_page("test", 1, len(links), [Book(title=f"Item {number}", link=link)
+                                          for number, link in enumerate(links)])
+    db.add_item_details({links[0]: item_page_sample_details}, enriched_at=time.time())
+    response_cache = ResponseCache()
+    response_cache.put(scraper.urljoin(scraper.BASE_URL, links[1]), item_page_sample)
+    catalog = FakeCatalog(0, delay=0.01)
+    batches = []
+    add_item_details = db.add_item_details
+
+    def fetch(url):
+        catalog(url)
+        return item_page_sample
+
+    def record_batch(details):
+        batches.append(sorted(details))
+        add_item_details(details)
+
+    monkeypatch.setattr(scraper, "_fetch_html", fetch)
+    monkeypatch.setattr(scraper, "DETAIL_BATCH_SIZE", 2)
+    monkeypatch.setattr(db, "add_item_details", record_batch)
+
+    enriched = enrich_library_items(db, max_age=3600, concurrency=2, response_cache=response_cache)
+
+    assert enriched == 6
+    assert len(catalog.requests) == 5
+    assert catalog.peak <= 2
+    assert (response_cache.hits, response_cache.misses) == (1, 5)
+    assert sorted(link for batch in batches for link in batch) == links[1:]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert db.get_links_to_enrich(max_age=3600) == []
+    assert {key: value for key, value in db.get_item_details(links[6]).items()
+            if key != "enriched_at"} == item_page_sample_details
+
+def test_reparse_archive(db, monkeypatch, tmp_path):
+    """Test that archived partition pages rebuild items, memberships and checkpoints offline."""
+    catalog = FakeCatalog(40)
+    archive = PageArchive(str(tmp_path / "archive.db"))
+    monkeypatch.setattr(scraper, "_fetch_html", catalog)
+
+    scrape_library_data(db, "test", partition_by="format", archive=archive)
+    scrape_library_data(db, "other", archive=archive)
+    keys = db.get_scrape_queries()
+    progress = [db.get_scrape_progress(key) for key in keys]
+    items = db.get_all_library_items()
+    memberships = db.get_items_by_query()
+
+    def fetch(url):
+        raise AssertionError(f"reparse fetched {url}")
+
+    monkeypatch.setattr(scraper, "_fetch_html", fetch)
+    db.create_table()
+
+    assert reparse_archive(db, archive, "test") == 2 * len(scraper.FORMAT_FILTER.split("|"))
+    assert reparse_archive(db, archive, "other") == 2
+    assert "test [f_FORMAT=BK]" in keys
+    assert db.get_scrape_queries() == keys
+    assert [db.get_scrape_progress(key) for key in keys] == progress
+    assert db.get_all_library_items() == items
+    assert db.get_items_by_query() == memberships
+    assert db.get_item_count("test") == 8
+
+def test_iter_parsed_pages_process_pool(db):
+    """Test that chunks mixing cache hits and misses come back in order and fill the cache."""
+    pages = [(page_number, f"/page/{page_number}", search_page(page_number, 200))
+             for page_number in range(1, 10)]
+    pages[6] = (7, "/page/7", None)
+    cache = ParseCache()
+    for page_number in (2, 5):
+        library_html = pages[page_number - 1][2]
+        cache.put(scraper.page_fingerprint(library_html),
+                  *scraper.parse_search_pages([library_html])[0])
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parsed = list(scraper._iter_parsed_pages(iter(pages), scraper._StageTimer(), executor,
+                                                 workers=2, chunksize=3, cache=cache))
+
+    assert [page_number for page_number, _, _, _ in parsed] == list(range(1, 10))
+    assert [len(books) for _, _, _, (_, books) in parsed] == [4] * 6 + [0] + [4] * 2
+    assert all(books[0].link == f"/v2/record/S114P{page_number}C1369884095"
+               for page_number, _, _, (_, books) in parsed if books)
+    assert (cache.hits, cache.misses) == (2, 6)
+    assert all(cache.get(scraper.page_fingerprint(library_html)) is not None
+               for _, _, library_html in pages if library_html is not None)